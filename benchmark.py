@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import column
+import player
+import steamid
+
+HEADER = '# userid name                uniqueid            connected ping loss state'
+# a full server, a busy community server, then bulk log sizes
+SIZES = (24, 100, 10000, 1000000)
+DEFAULT_THRESHOLD = 0.1
+results = dict()
+
+
+def make_status(lines: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    out = list()
+    userid = 1
+    while len(out) < lines:
+        if len(out) % 25 == 0:
+            out.append('hostname: Valve Matchmaking Server (Virginia srcds1001-iad1 #42)')
+            out.append(HEADER)
+            continue
+        if rnd.random() < 0.05:
+            out.append(f'#{userid:>7} "Bot {userid}"           BOT                       active')
+        else:
+            accountid = rnd.randrange(1, 2**31)
+            connected = f'{rnd.randrange(60)}:{rnd.randrange(60):02}'
+            out.append(f'#{userid:>7} "player {userid}"     [U:1:{accountid}]   {connected}   {rnd.randrange(20, 150)}    0 active')
+        userid += 1
+    return '\n'.join(out[:lines])
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:10.2f} ms'
+    if seconds >= 1e-6:
+        return f'{seconds * 1e6:10.2f} us'
+    return f'{seconds * 1e9:10.0f} ns'
+
+
+def bench(name: str, func, repeat: int = 5):
+    # loops until a sample takes 0.2s, slow cases only get one extra sample
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    samples = [elapsed] + timer.repeat(repeat - 1 if elapsed < 1 else 1, number)
+    best = min(samples) / number
+    results[name] = best
+    print(f'{name:<48} {format_time(best)}')
+    return best
+
+
+def bench_parse_status(lines: int = 100000):
+    status = make_status(lines)
+    assert [(p.userid, p.name, int(p.steamid), p.connected) for p in player.parse_status(status)] == \
+        [(p.userid, p.name, int(p.steamid), p.connected) for p in player.parse_status_bulk(status)]
+    print(f'parse_status, {lines} lines')
+    bench(f'parse_status[{lines}]', lambda: player.parse_status(status))
+    bench(f'parse_status_bulk[{lines}]', lambda: player.parse_status_bulk(status))
+
+
+def replace_content(fmt: str, p: player.Player) -> str:
+    # the chained str.replace rendering CustomColumn used before templates were compiled
+    out = fmt
+    out = out.replace('${userid}', str(p.userid))
+    out = out.replace('${name}', p.name)
+    out = out.replace('${steam64}', str(p.steamid.as_64))
+    out = out.replace('${steam2}', p.steamid.as_steam2)
+    out = out.replace('${steam3}', p.steamid.as_steam3)
+    return out
+
+
+def bench_custom_columns(players: int = 10000, columns: int = 10):
+    formats = [
+        'https://steamcommunity.com/profiles/${steam64}',
+        'https://steamid.uk/profile/${steam64}',
+        '${name}',
+        '${steam3}',
+        '${userid}: ${name}',
+        'https://logs.tf/profile/${steam64}',
+        '${steam2}',
+        'https://rgl.gg/Public/PlayerProfile.aspx?p=${steam64}',
+        'callvote kick ${userid}',
+        '${name} ${steam3}',
+    ]
+    formats = (formats * (columns // len(formats) + 1))[:columns]
+    roster = player.parse_status(make_status(players * 2))[:players]
+    customs = [column.CustomColumn(i, f'custom {i}', fmt) for i, fmt in enumerate(formats)]
+    print(f'CustomColumn.content, {len(roster)} players x {columns} columns')
+    bench(f'custom_columns.replace[{players}]', lambda: [[replace_content(fmt, p) for fmt in formats] for p in roster])
+    bench(f'custom_columns.content[{players}]', lambda: [[c.content(p) for c in customs] for p in roster])
+
+
+def bench_render(players: int = 10000):
+    opt = {k: True for k in ('steam64', 'steam2', 'steam3', 'connected', 'profile')}
+    opt['custom'] = [{'name': 'logs.tf', 'format': 'https://logs.tf/profile/${steam64}'}, {'name': 'kick', 'format': 'callvote kick ${userid}'}]
+    columns = column.ColumnManager()
+    columns.register(*column.from_options(opt))
+    roster = player.parse_status(make_status(players * 2))[:players]
+    assert [list(row) for row in zip(*columns.render(roster))] == [columns.get_item(p) for p in roster]
+    print(f'ColumnManager, {len(roster)} players x {columns.count} columns')
+    bench(f'get_item[{players}]', lambda: [columns.get_item(p) for p in roster])
+    bench(f'render[{players}]', lambda: columns.render(roster))
+    bench(f'render_masked[{players}]', lambda: columns.mask_links(columns.render(roster)))
+
+
+def bench_make_steam64(number: int = 100000):
+    inputs = {
+        'steam3 [U:1:N]': '[U:1:111111111]',
+        'steam3 [U:1:N:I]': '[U:1:111111111:2]',
+        'steam3 [g:1:N]': '[g:1:4]',
+        'steam2': 'STEAM_1:1:55555555',
+        'steam2 universe 0': 'STEAM_0:1:55555555',
+        'steam64 str': '76561198071377839',
+        'steam64 int': 76561198071377839,
+        'accountid str': '111111111',
+        'accountid int': 111111111,
+        'keywords': None,
+    }
+    print('make_steam64, per ID')
+    for name, value in inputs.items():
+        if value is None:
+            func = lambda: steamid.make_steam64(111111111, type='Individual', universe='Public')  # noqa: E731
+        else:
+            func = lambda: steamid.make_steam64(value)  # noqa: E731
+        bench(f'make_steam64[{name}]', func)
+
+
+def bench_steamid_formats(ids: int = 10000):
+    # fresh objects every round, a warm cached_property would only time a dict lookup
+    rnd = random.Random(0)
+    accounts = [f'[U:1:{rnd.randrange(1, 2**31)}]' for _ in range(ids)]
+    print(f'SteamID formats, {ids} IDs')
+    bench(f'SteamID[{ids}]', lambda: [steamid.SteamID(a) for a in accounts])
+    bench(f'SteamID.as_steam3[{ids}]', lambda: [steamid.SteamID(a).as_steam3 for a in accounts])
+    bench(f'SteamID.as_steam2[{ids}]', lambda: [steamid.SteamID(a).as_steam2 for a in accounts])
+
+
+def start_display():
+    # a virtual X server for the GUI benchmark when there is no display, returns the process to stop afterwards
+    if sys.platform in ('win32', 'darwin') or os.environ.get('DISPLAY'):
+        return None
+    if shutil.which('Xvfb') is None:
+        raise RuntimeError('no DISPLAY and Xvfb is not installed')
+    for number in range(99, 199):
+        if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            continue
+        proc = subprocess.Popen(['Xvfb', f':{number}', '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'], stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+                os.environ['DISPLAY'] = f':{number}'
+                return proc
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+        proc.kill()
+    raise RuntimeError('could not start Xvfb')
+
+
+def bench_reload_players(sizes: tuple = SIZES[:3], timeout: float = 120):
+    try:
+        import wx
+    except ImportError:
+        print('reload_players: wxPython is not installed, skipped')
+        return
+    display = start_display()
+    # the frame keeps its options and history in the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='statusenhancer-bench-'))
+    try:
+        import status_enhancer
+        app = wx.App(False)
+        frame = status_enhancer.frameMain(None)
+        frame.Show(True)
+
+        def wait(action):
+            # from the call until the worker result is shown in the list
+            before = frame.real_data
+            start = time.perf_counter()
+            action()
+            while frame.real_data is before:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError('timed out waiting for the player list')
+                app.Yield()
+                time.sleep(0.001)
+            return time.perf_counter() - start
+
+        print('frameMain, worker thread to list')
+        for size in sizes:
+            players = player.parse_status(make_status(size))
+            wait(lambda: frame.apply_players(players))
+            for name, action in (('reload_players', frame.reload_players), ('reload_columns', frame.reload_columns)):
+                best = min(wait(action) for _ in range(5))
+                results[f'{name}[{size}]'] = best
+                print(f'{name}[{size}]'.ljust(48), format_time(best))
+        frame.Close(True)
+        app.Yield()
+    finally:
+        os.chdir(cwd)
+        if display is not None:
+            display.terminate()
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    # names whose time grew by more than threshold, as a fraction of the baseline
+    regressions = list()
+    print(f'{"benchmark":<48} {"baseline":>13} {"current":>13} {"change":>8}')
+    for name, seconds in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = seconds / old - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<48} {format_time(old)} {format_time(seconds)} {change:+8.1%}{flag}')
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parsing, SteamID conversion, column rendering and the player list.')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help=f'comma-separated status line counts (default: {",".join(map(str, SIZES))})')
+    parser.add_argument('--gui', action='store_true', help='also time frameMain.reload_players, under Xvfb when there is no display')
+    parser.add_argument('--json', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare with results written by an earlier --json run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='slowdown counted as a regression (default: 0.1 for 10%%)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    for size in sizes:
+        bench_parse_status(size)
+    for size in sizes:
+        bench_render(size)
+    bench_custom_columns()
+    bench_make_steam64()
+    bench_steamid_formats()
+    if args.gui:
+        bench_reload_players(tuple(s for s in sizes if s <= 100000))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': int(time.time()),
+                'results': results
+            }, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regressions over {args.threshold:.0%}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import column
+import option
+import player
+
+FORMATS = ('tsv', 'csv', 'json')
+BUILTIN_COLUMNS = ('steam64', 'steam2', 'steam3', 'connected', 'profile')
+DEFAULT_TIMEOUT = 5.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='statusenhancer', description='Convert TF2 status dumps without the GUI.')
+    parser.add_argument('inputs', nargs='*', default=['-'], help='status dumps or console logs, "-" for stdin')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='tsv', help='output format (default: tsv)')
+    parser.add_argument('-c', '--columns', help=f'comma-separated built-in columns: {",".join(BUILTIN_COLUMNS)} (default: from statusenhancer.json)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='worker processes, 0 for one per CPU (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=64, help='files per work unit with --jobs (default: 64)')
+    parser.add_argument('--rcon', metavar='HOST[:PORT]', help='read status from a server over RCON instead of files')
+    parser.add_argument('--password', default='', help='RCON password')
+    parser.add_argument('--monitor', metavar='FILE', help='poll every server in FILE (address password name per line) concurrently over RCON')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help=f'per-server RCON timeout with --monitor (default: {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('--unordered', action='store_true', help='write files as workers finish them instead of in input order')
+    return parser.parse_args(argv)
+
+
+def column_options(columns: str = None) -> dict:
+    opt = option.load_options()['columns']
+    if columns is None:
+        return opt
+    names = [c.strip() for c in columns.split(',') if c.strip()]
+    unknown = [c for c in names if c not in BUILTIN_COLUMNS]
+    if unknown:
+        raise ValueError(f'unknown column: {", ".join(unknown)}')
+    out = {k: k in names for k in BUILTIN_COLUMNS}
+    out['custom'] = opt['custom']
+    return out
+
+
+class LineCounter:
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.count = 0
+
+    def __iter__(self):
+        for line in self.lines:
+            self.count += 1
+            yield line
+
+
+def parse_lines(lines) -> tuple:
+    # streams lines through the parser, returns the players and how many lines there were
+    counter = LineCounter(lines)
+    players = player.sort_players(player.iter_status(counter))
+    return players, counter.count
+
+
+def read_players(path: str) -> tuple:
+    if path == '-':
+        return parse_lines(sys.stdin)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return parse_lines(f)
+
+
+columns = None
+
+
+def init_columns(opt: dict, server: bool = False):
+    global columns
+    columns = column.ColumnManager()
+    columns.register(*column.from_options(opt, server=server))
+
+
+def render_files(paths: list) -> list:
+    # runs in the worker processes, returns (path, column-major cells, line count, error) per file
+    out = list()
+    for path in paths:
+        try:
+            players, line_count = read_players(path)
+        except OSError as e:
+            out.append((path, list(), 0, str(e)))
+            continue
+        out.append((path, columns.render(players), line_count, None))
+    return out
+
+
+def rcon_results(address: str, password: str, opt: dict) -> list:
+    # like the GUI, rcon and monitor are only imported by the runs that poll servers
+    import rcon
+    init_columns(opt)
+    try:
+        host, port = rcon.parse_address(address)
+        client = rcon.RCONClient(host, port, password)
+        try:
+            text = client.execute('status')
+        finally:
+            client.close()
+    except (ValueError, OSError, rcon.RCONError) as e:
+        return [(address, list(), 0, str(e))]
+    players, line_count = parse_lines(text.splitlines())
+    return [(address, columns.render(players), line_count, None)]
+
+
+def monitor_results(path: str, timeout: float, opt: dict) -> list:
+    import asyncio
+    import monitor
+    init_columns(opt, server=True)
+    try:
+        servers = monitor.load_servers(path)
+    except (OSError, ValueError) as e:
+        return [(path, list(), 0, str(e))]
+    server_monitor = monitor.ServerMonitor(servers, timeout=timeout)
+
+    async def poll():
+        try:
+            return await server_monitor.poll()
+        finally:
+            await server_monitor.aclose()
+
+    start = time.perf_counter()
+    players = asyncio.run(poll())
+    print(f'polled {len(servers)} servers in {time.perf_counter() - start:.2f} s', file=sys.stderr)
+    out = [(server, list(), 0, f'{server}: {error}') for server, error in server_monitor.errors().items()]
+    out.append((path, columns.render(players), len(players), None))
+    return out
+
+
+def iter_results(paths: list, opt: dict, jobs: int, chunksize: int, ordered: bool):
+    if jobs == 1:
+        init_columns(opt)
+        yield from render_files(paths)
+        return
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    with ProcessPoolExecutor(max_workers=jobs or None, initializer=init_columns, initargs=(opt,)) as executor:
+        if ordered:
+            for results in executor.map(render_files, chunks):
+                yield from results
+        else:
+            futures = [executor.submit(render_files, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+class Writer:
+
+    def __init__(self, out, fmt: str, header: list):
+        self.out = out
+        self.fmt = fmt
+        self.header = header
+        self.first = True
+        if fmt == 'json':
+            out.write('[')
+        else:
+            delimiter = '\t' if fmt == 'tsv' else ','
+            self.csv = csv.writer(out, delimiter=delimiter, lineterminator='\n')
+            self.csv.writerow(header)
+
+    def write(self, row: list):
+        if self.fmt != 'json':
+            self.csv.writerow(['' if v is None else v for v in row])
+            return
+        if not self.first:
+            self.out.write(',')
+        self.out.write('\n  ')
+        json.dump(dict(zip(self.header, row)), self.out, ensure_ascii=False)
+        self.first = False
+
+    def close(self):
+        if self.fmt == 'json':
+            self.out.write('\n]\n' if not self.first else ']\n')
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        opt = column_options(args.columns)
+    except ValueError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+    if '-' in args.inputs and args.jobs != 1:
+        print('error: stdin can\'t be read by worker processes', file=sys.stderr)
+        return 2
+    header = [col.name for col in column.from_options(opt, server=bool(args.monitor))]
+    with_file = len(args.inputs) > 1
+    if with_file:
+        header.insert(0, 'File')
+
+    ret = 0
+    files = lines = rows = 0
+    start = time.perf_counter()
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        writer = Writer(out, args.format, header)
+        if args.monitor:
+            results = monitor_results(args.monitor, args.timeout, opt)
+        elif args.rcon:
+            results = rcon_results(args.rcon, args.password, opt)
+        else:
+            results = iter_results(args.inputs, opt, args.jobs, max(args.chunksize, 1), not args.unordered)
+        for path, items, line_count, error in results:
+            if error is not None:
+                print(f'error: {error}', file=sys.stderr)
+                ret = 1
+                continue
+            files += 1
+            lines += line_count
+            count = len(items[0]) if items else 0
+            rows += count
+            if with_file:
+                items = [[path] * count] + items
+            for row in zip(*items):
+                writer.write(row)
+        writer.close()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.jobs != 1:
+        elapsed = time.perf_counter() - start
+        jobs = args.jobs or os.cpu_count()
+        print(f'{files} files, {lines} lines, {rows} players in {elapsed:.2f} s with {jobs} workers '
+              f'({files / elapsed:.1f} files/s, {lines / elapsed:.0f} lines/s)', file=sys.stderr)
+    return ret
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,31 @@
+import re
+import time
+
 from player import Player
 from utils import base36
 
+var_pat = re.compile(r'\$\{(\w+)\}')
+FIELDS = {
+    'userid': lambda p: str(p.userid),
+    'name': lambda p: p.name,
+    'steam64': lambda p: str(p.steamid.as_64),
+    'steam32': lambda p: str(p.steamid.as_32),
+    'steam2': lambda p: p.steamid.as_steam2,
+    'steam2_zero': lambda p: p.steamid.as_steam2_zero,
+    'steam3': lambda p: p.steamid.as_steam3,
+    'connected': lambda p: p.connected_str,
+}
+
 
 class Column:
 
     def content(self, player: Player):
         pass
 
+    def render(self, players: list) -> list:
+        # the whole column at once, built-in columns override this with a plain comprehension
+        return [self.content(p) for p in players]
+
 
 class ColumnUserID(Column):
 
@@ -15,6 +34,9 @@ class ColumnUserID(Column):
     def content(self, player: Player) -> str:
         return str(player.userid)
 
+    def render(self, players: list) -> list:
+        return [str(p.userid) for p in players]
+
 
 class ColumnName(Column):
 
@@ -23,6 +45,9 @@ class ColumnName(Column):
     def content(self, player: Player) -> str:
         return player.name
 
+    def render(self, players: list) -> list:
+        return [p.name for p in players]
+
 
 class ColumnSteam64(Column):
 
@@ -31,6 +56,9 @@ class ColumnSteam64(Column):
     def content(self, player: Player) -> str:
         return str(player.steamid.as_64)
 
+    def render(self, players: list) -> list:
+        return [str(p.steamid.as_64) for p in players]
+
 
 class ColumnSteam2(Column):
 
@@ -39,6 +67,9 @@ class ColumnSteam2(Column):
     def content(self, player: Player) -> str:
         return player.steamid.as_steam2
 
+    def render(self, players: list) -> list:
+        return [p.steamid.as_steam2 for p in players]
+
 
 class ColumnSteam3(Column):
 
@@ -47,6 +78,9 @@ class ColumnSteam3(Column):
     def content(self, player: Player) -> str:
         return player.steamid.as_steam3
 
+    def render(self, players: list) -> list:
+        return [p.steamid.as_steam3 for p in players]
+
 
 class ColumnConnected(Column):
 
@@ -55,6 +89,20 @@ class ColumnConnected(Column):
     def content(self, player: Player) -> str:
         return player.connected_str
 
+    def render(self, players: list) -> list:
+        return [p.connected_str for p in players]
+
+
+class ColumnServer(Column):
+
+    name = 'Server'
+
+    def content(self, player: Player) -> str:
+        return player.server
+
+    def render(self, players: list) -> list:
+        return [p.server for p in players]
+
 
 class ColumnProfile(Column):
 
@@ -63,6 +111,9 @@ class ColumnProfile(Column):
     def content(self, player: Player) -> str:
         return player.steamid.community_url
 
+    def render(self, players: list) -> list:
+        return [p.steamid.community_url for p in players]
+
 
 class ColumnProfileShort(Column):
 
@@ -71,6 +122,72 @@ class ColumnProfileShort(Column):
     def content(self, player: Player) -> str:
         return f'https://steam.pm/{base36(player.steamid.id)}'
 
+    def render(self, players: list) -> list:
+        return [f'https://steam.pm/{base36(p.steamid.id)}' for p in players]
+
+
+class SightingColumn(Column):
+
+    def __init__(self, sightings):
+        self.sightings = sightings
+
+    def sighting(self, player: Player) -> dict:
+        return self.sightings.get(int(player.steamid))
+
+    def render_sightings(self, players: list) -> list:
+        get = self.sightings.get
+        return [get(int(p.steamid)) for p in players]
+
+
+class ColumnTimesSeen(SightingColumn):
+
+    name = 'Times seen'
+
+    def content(self, player: Player) -> str:
+        return str(self.sighting(player)['times_seen'])
+
+    def render(self, players: list) -> list:
+        return [str(s['times_seen']) for s in self.render_sightings(players)]
+
+
+class ColumnFirstSeen(SightingColumn):
+
+    name = 'First seen'
+
+    def content(self, player: Player) -> str:
+        return format_timestamp(self.sighting(player)['first_seen'])
+
+    def render(self, players: list) -> list:
+        return [format_timestamp(s['first_seen']) for s in self.render_sightings(players)]
+
+
+class ColumnLastSeen(SightingColumn):
+
+    name = 'Last seen'
+
+    def content(self, player: Player) -> str:
+        return format_timestamp(self.sighting(player)['last_seen'])
+
+    def render(self, players: list) -> list:
+        return [format_timestamp(s['last_seen']) for s in self.render_sightings(players)]
+
+
+class ColumnKnownNames(SightingColumn):
+
+    name = 'Known names'
+
+    def content(self, player: Player) -> str:
+        return ', '.join(self.sighting(player)['names'])
+
+    def render(self, players: list) -> list:
+        return [', '.join(s['names']) for s in self.render_sightings(players)]
+
+
+def format_timestamp(timestamp: int) -> str:
+    if timestamp is None:
+        return ''
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
 
 class CustomColumn(Column):
 
@@ -78,15 +195,68 @@ class CustomColumn(Column):
         self.idx = idx
         self.name = name
         self.fmt = fmt
+        self.template = compile_format(fmt)
 
     def content(self, player: Player) -> str:
-        out = self.fmt
-        out = out.replace('${userid}', str(player.userid))
-        out = out.replace('${name}', player.name)
-        out = out.replace('${steam64}', str(player.steamid.as_64))
-        out = out.replace('${steam2}', player.steamid.as_steam2)
-        out = out.replace('${steam3}', player.steamid.as_steam3)
-        return out
+        return ''.join([part if isinstance(part, str) else part(player) for part in self.template])
+
+    def render(self, players: list) -> list:
+        # one pass per variable over the whole roster, then a single join per row
+        if not self.template:
+            return [''] * len(players)
+        parts = [[part] * len(players) if isinstance(part, str) else [part(p) for p in players] for part in self.template]
+        if len(parts) == 1:
+            return parts[0]
+        return [''.join(row) for row in zip(*parts)]
+
+
+def compile_format(fmt: str) -> list:
+    # literal strings and field getters, unknown variables are kept as they are
+    template = list()
+    pos = 0
+    for match in var_pat.finditer(fmt):
+        getter = FIELDS.get(match.group(1))
+        if getter is None:
+            continue
+        if match.start() > pos:
+            template.append(fmt[pos:match.start()])
+        template.append(getter)
+        pos = match.end()
+    if pos < len(fmt):
+        template.append(fmt[pos:])
+    return template
+
+
+def from_options(opt: dict, sightings=None, server: bool = False) -> list:
+    col_map = {
+        'steam64': ColumnSteam64,
+        'steam2': ColumnSteam2,
+        'steam3': ColumnSteam3,
+        'connected': ColumnConnected,
+        'profile': ColumnProfile
+    }
+    sighting_map = {
+        'times_seen': ColumnTimesSeen,
+        'first_seen': ColumnFirstSeen,
+        'last_seen': ColumnLastSeen,
+        'known_names': ColumnKnownNames
+    }
+    col_objs = [
+        ColumnUserID(),
+        ColumnName()
+    ]
+    if server:
+        col_objs.insert(0, ColumnServer())
+    for k, v in col_map.items():
+        if opt[k]:
+            col_objs.append(v())
+    if sightings is not None:
+        for k, v in sighting_map.items():
+            if opt[k]:
+                col_objs.append(v(sightings))
+    for i, custom in enumerate(opt['custom']):
+        col_objs.append(CustomColumn(i, custom['name'], custom['format']))
+    return col_objs
 
 
 class ColumnManager:
@@ -115,9 +285,24 @@ class ColumnManager:
             out.append(self.columns[i].content(player))
         return out
 
+    def render(self, players: list) -> list:
+        # column-major: one list of cells per column, rows are data[col][i]
+        return [self.columns[i].render(players) for i in range(self.count)]
+
     def is_link(self, col) -> bool:
         return self.link[col]
 
+    def has_sightings(self) -> bool:
+        return any(isinstance(col, SightingColumn) for col in self.columns.values())
+
+    def shows_connected(self) -> bool:
+        for col in self.columns.values():
+            if isinstance(col, ColumnConnected):
+                return True
+            if isinstance(col, CustomColumn) and FIELDS['connected'] in col.template:
+                return True
+        return False
+
     def is_custom(self, col) -> bool:
         column = self.columns[col]
         return isinstance(column, CustomColumn)
@@ -134,11 +319,12 @@ class ColumnManager:
                 ids.append(i)
         return ids
 
-    def filter_link_items(self, items: list) -> list:
+    def mask_links(self, data: list) -> list:
+        # data as returned by render, for display where links are shown as [Link]
         out = list()
-        for i, v in enumerate(items):
+        for i, cells in enumerate(data):
             if self.is_link(i):
-                out.append('[Link]')
+                out.append(['[Link]'] * len(cells))
                 continue
-            out.append(v)
+            out.append(cells)
         return out
@@ -0,0 +1,88 @@
+import mmap
+import os
+from typing import List, Optional
+
+import player
+from player import Player
+
+
+class LogTail:
+
+    def __init__(self, path: str, from_end: bool = True):
+        self.path = path
+        self.offset = os.path.getsize(path) if from_end else 0
+        self.partial = b''
+
+    def read_lines(self) -> List[str]:
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # log was truncated or replaced, start over
+            self.offset = 0
+            self.partial = b''
+        if size == self.offset:
+            return list()
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        return [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines]
+
+
+class RosterTracker:
+
+    def __init__(self):
+        self.roster = None
+
+    def feed(self, lines: List[str]) -> Optional[List[Player]]:
+        # a block is only complete once a line that isn't a '#' row follows it,
+        # until then the rest of the dump may still be on its way
+        latest = None
+        for line in lines:
+            if player.is_status_header(line):
+                self.roster = list()
+                continue
+            if self.roster is None:
+                continue
+            if line.startswith('#'):
+                p = player.parse_player(line)
+                if p is not None:
+                    self.roster.append(p)
+                continue
+            latest = player.sort_players(self.roster)
+            self.roster = None
+        return latest
+
+    def flush(self) -> Optional[List[Player]]:
+        # a quiet log ends the block too, nothing else may ever be written after the last status
+        if self.roster is None:
+            return None
+        roster, self.roster = self.roster, None
+        return player.sort_players(roster)
+
+
+def find_latest_status(path: str) -> str:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            start = len(m)
+            while True:
+                start = m.rfind(b'# userid', 0, start)
+                if start < 0:
+                    return ''
+                if start == 0 or m[start - 1] == ord('\n'):
+                    break
+            # the block runs until the first line that isn't a '#' row
+            end = start
+            while end < len(m):
+                newline = m.find(b'\n', end)
+                end = len(m) if newline < 0 else newline + 1
+                if m[end:end + 1] != b'#':
+                    break
+            return m[start:end].decode('utf-8', errors='replace')
+
+
+def load_latest_status(path: str) -> List[Player]:
+    return player.parse_status(find_latest_status(path))
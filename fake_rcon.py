@@ -0,0 +1,114 @@
+import argparse
+import random
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List
+
+import rcon
+
+MAX_BODY = 4096 - 10
+
+
+def make_status(players: int = 24, seed: int = None) -> str:
+    rnd = random.Random(seed)
+    lines = [
+        'hostname: StatusEnhancer fake server',
+        'version : 8835751/24 8835751 secure',
+        'map     : cp_badlands at: 0 x, 0 y, 0 z',
+        f'players : {players} humans, 0 bots (24 max)',
+        '# userid name                uniqueid            connected ping loss state  adr',
+    ]
+    for userid in range(2, players + 2):
+        connected = f'{rnd.randrange(60):02}:{rnd.randrange(60):02}'
+        lines.append(f'#{userid:>6} "player {userid}"    [U:1:{1000 + userid}]    {connected}   {rnd.randrange(20, 150)}    0 active')
+    return '\n'.join(lines) + '\n'
+
+
+class Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server
+        sock = self.request
+        authed = False
+        while True:
+            try:
+                request_id, kind, body = rcon.read_packet(sock)
+            except (OSError, rcon.RCONError):
+                return
+            if kind == rcon.SERVERDATA_AUTH:
+                authed = body == server.password
+                sock.sendall(rcon.pack_packet(request_id, rcon.SERVERDATA_RESPONSE_VALUE, ''))
+                sock.sendall(rcon.pack_packet(request_id if authed else -1, rcon.SERVERDATA_AUTH_RESPONSE, ''))
+                if not authed:
+                    return
+                continue
+            if not authed:
+                return
+            if kind == rcon.SERVERDATA_RESPONSE_VALUE:
+                # mirror the empty packet like srcds does, followed by its odd extra packet
+                sock.sendall(rcon.pack_packet(request_id, rcon.SERVERDATA_RESPONSE_VALUE, ''))
+                sock.sendall(rcon.pack_packet(request_id, rcon.SERVERDATA_RESPONSE_VALUE, '\x00\x01\x00\x00'))
+                continue
+            server.commands.append(body)
+            if server.delay:
+                time.sleep(server.delay)
+            response = server.respond(body)
+            data = b''.join(
+                rcon.pack_packet(request_id, rcon.SERVERDATA_RESPONSE_VALUE, response[i:i + MAX_BODY])
+                for i in range(0, max(len(response), 1), MAX_BODY)
+            )
+            sock.sendall(data)
+
+
+class FakeRCONServer(socketserver.ThreadingTCPServer):
+    """Local stand-in for a game server's RCON port, answers ``status`` with a synthetic roster."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, password: str = 'password', responses: Dict[str, Callable] = None, delay: float = 0):
+        socketserver.ThreadingTCPServer.__init__(self, (host, port), Handler)
+        self.password = password
+        self.delay = delay
+        self.responses = {'status': make_status}
+        if responses:
+            self.responses.update(responses)
+        self.commands = list()
+        self.thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f'{host}:{port}'
+
+    def respond(self, command: str) -> str:
+        response = self.responses.get(command.strip())
+        if response is None:
+            return f'Unknown command "{command}"\n'
+        return response() if callable(response) else response
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='fake-rcon', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def start_pool(count: int, password: str = 'password', delay: float = 0) -> List[FakeRCONServer]:
+    return [FakeRCONServer(password=password, delay=delay).start() for _ in range(count)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local fake RCON server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=rcon.DEFAULT_PORT)
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--players', type=int, default=24)
+    args = parser.parse_args()
+    server = FakeRCONServer(args.host, args.port, args.password, {'status': lambda: make_status(args.players)})
+    print(f'fake RCON server on {server.address}, password "{args.password}"')
+    server.serve_forever()
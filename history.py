@@ -0,0 +1,254 @@
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import List
+
+from player import Player
+
+FILE = 'statusenhancer.db'
+CACHE_SIZE = 4096
+QUERY_CHUNK = 500
+SEARCH_LIMIT = 200
+SIMILARITY = 0.3
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sightings (
+    steam64 INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    seen INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sightings_steam64 ON sightings (steam64);
+CREATE INDEX IF NOT EXISTS sightings_name ON sightings (name);
+CREATE INDEX IF NOT EXISTS sightings_seen ON sightings (seen);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    grams INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS name_grams (
+    gram TEXT NOT NULL,
+    name_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, name_id)
+) WITHOUT ROWID;
+'''
+SCHEMA_VERSION = 1
+
+
+def empty_sighting() -> dict:
+    return {
+        'times_seen': 0,
+        'first_seen': None,
+        'last_seen': None,
+        'names': list()
+    }
+
+
+def name_grams(name: str) -> set:
+    name = ' '.join(name.casefold().split())
+    if not name:
+        return set()
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query_grams: int, shared: int) -> float:
+    # how much of the query a name covers, so a fragment of a longer name still scores high
+    return shared / query_grams
+
+
+def name_matches(text: str, name: str) -> bool:
+    if text.casefold() in name.casefold():
+        return True
+    query, grams = name_grams(text), name_grams(name)
+    if not query or not grams:
+        return False
+    return similarity(len(query), len(query & grams)) >= SIMILARITY
+
+
+def index_names(conn: sqlite3.Connection, names):
+    for name in names:
+        cursor = conn.execute('INSERT OR IGNORE INTO names (name, grams) VALUES (?, 0)', (name,))
+        if cursor.rowcount != 1:
+            continue
+        grams = name_grams(name)
+        name_id = cursor.lastrowid
+        conn.execute('UPDATE names SET grams = ? WHERE id = ?', (len(grams), name_id))
+        conn.executemany('INSERT INTO name_grams (gram, name_id) VALUES (?, ?)', [(gram, name_id) for gram in grams])
+
+
+class SightingCache:
+
+    def __init__(self, history, size: int = CACHE_SIZE):
+        self.history = history
+        self.min_size = size
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, steam64: int) -> dict:
+        # never queries, call prefetch() once per roster first
+        entry = self.entries.get(steam64)
+        if entry is None:
+            return empty_sighting()
+        self.entries.move_to_end(steam64)
+        return entry
+
+    def prefetch(self, players: List[Player]):
+        # the whole roster has to stay cached until it is rendered, so the cache grows to fit it
+        steam64s = {int(p.steamid) for p in players}
+        self.size = max(self.min_size, len(steam64s))
+        for steam64 in steam64s & self.entries.keys():
+            self.entries.move_to_end(steam64)
+        missing = steam64s - self.entries.keys()
+        if not missing:
+            return
+        found = self.history.lookup_many(missing)
+        for steam64 in missing:
+            self.put(steam64, found.get(steam64, empty_sighting()))
+
+    def put(self, steam64: int, entry: dict):
+        self.entries[steam64] = entry
+        self.entries.move_to_end(steam64)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def note(self, rows: list):
+        # keep cached entries in step with sightings that are still queued for writing
+        for steam64, name, seen in rows:
+            entry = self.entries.get(steam64)
+            if entry is None:
+                continue
+            entry['times_seen'] += 1
+            entry['first_seen'] = seen if entry['first_seen'] is None else min(entry['first_seen'], seen)
+            entry['last_seen'] = seen if entry['last_seen'] is None else max(entry['last_seen'], seen)
+            if name in entry['names']:
+                entry['names'].remove(name)
+            entry['names'].insert(0, name)
+
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class History:
+
+    def __init__(self, path: str = FILE):
+        self.path = path
+        self.queue = queue.Queue()
+        self.reader = None
+        self.read_error = False
+        # the reader is shared by the UI and the render worker
+        self.reader_lock = threading.Lock()
+        self.cache = SightingCache(self)
+        self.thread = threading.Thread(target=self.run, name='history', daemon=True)
+        self.thread.start()
+
+    def record(self, players: List[Player], seen: int = None):
+        # nothing would drain the queue once the writer died, e.g. on a database it can't open
+        if not players or not self.thread.is_alive():
+            return
+        if seen is None:
+            seen = int(time.time())
+        rows = [(int(p.steamid), p.name, seen) for p in players]
+        self.cache.note(rows)
+        self.queue.put(rows)
+
+    def run(self):
+        # the only thread that writes, one transaction per roster
+        conn = connect(self.path)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            # databases from before the name index, indexed once
+            with conn:
+                index_names(conn, [row[0] for row in conn.execute('SELECT DISTINCT name FROM sightings')])
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        while True:
+            rows = self.queue.get()
+            if rows is None:
+                break
+            try:
+                with conn:
+                    conn.executemany('INSERT INTO sightings (steam64, name, seen) VALUES (?, ?, ?)', rows)
+                    index_names(conn, {row[1] for row in rows})
+            except sqlite3.Error:
+                # this roster is lost, the next one may well go through
+                traceback.print_exc()
+        conn.close()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        with self.reader_lock:
+            if self.reader is not None:
+                self.reader.close()
+                self.reader = None
+
+    def connect_reader(self) -> sqlite3.Connection:
+        if self.reader is None:
+            self.reader = connect(self.path, check_same_thread=False)
+        return self.reader
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> set:
+        # steam64s of every player who ever used a name resembling text
+        query = name_grams(text)
+        if not query:
+            return set()
+        with self.reader_lock:
+            try:
+                conn = self.connect_reader()
+                query = list(query)
+                rows = conn.execute(
+                    'SELECT names.name, hits.shared FROM ('
+                    f'SELECT name_id, COUNT(*) AS shared FROM name_grams WHERE gram IN ({", ".join("?" * len(query))}) '
+                    'GROUP BY name_id ORDER BY shared DESC LIMIT ?'
+                    ') AS hits JOIN names ON names.id = hits.name_id', query + [limit]
+                )
+                # same test as name_matches, on the names that share the most grams with text
+                folded = text.casefold()
+                names = [name for name, shared in rows if folded in name.casefold() or similarity(len(query), shared) >= SIMILARITY]
+                if not names:
+                    return set()
+                rows = conn.execute(f'SELECT DISTINCT steam64 FROM sightings WHERE name IN ({", ".join("?" * len(names))})', names)
+                return {row[0] for row in rows}
+            except sqlite3.Error:
+                self.read_failed()
+                return set()
+
+    def lookup(self, steam64: int) -> dict:
+        return self.lookup_many([steam64]).get(steam64, empty_sighting())
+
+    def lookup_many(self, steam64s) -> dict:
+        with self.reader_lock:
+            out = dict()
+            try:
+                conn = self.connect_reader()
+                steam64s = list(steam64s)
+                for i in range(0, len(steam64s), QUERY_CHUNK):
+                    chunk = steam64s[i:i + QUERY_CHUNK]
+                    rows = conn.execute(
+                        'SELECT steam64, name, COUNT(*), MIN(seen), MAX(seen) FROM sightings '
+                        f'WHERE steam64 IN ({", ".join("?" * len(chunk))}) '
+                        'GROUP BY steam64, name ORDER BY MAX(seen) DESC', chunk
+                    )
+                    for steam64, name, times_seen, first_seen, last_seen in rows:
+                        entry = out.get(steam64)
+                        if entry is None:
+                            entry = out[steam64] = empty_sighting()
+                            entry['first_seen'] = first_seen
+                            entry['last_seen'] = last_seen
+                        entry['times_seen'] += times_seen
+                        entry['first_seen'] = min(entry['first_seen'], first_seen)
+                        entry['names'].append(name)
+            except sqlite3.Error:
+                self.read_failed()
+                return dict()
+            return out
+
+    def read_failed(self):
+        # the history is optional, without a readable database players just have no sightings
+        if not self.read_error:
+            self.read_error = True
+            traceback.print_exc()
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+NULL_TIMER = nullcontext()
+
+
+class Stat:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.min = elapsed if self.min is None else min(self.min, elapsed)
+        self.max = elapsed if self.max is None else max(self.max, elapsed)
+        self.last = elapsed
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'last': self.last
+        }
+
+
+class Timer:
+
+    __slots__ = ('stats', 'name', 'into', 'start')
+
+    def __init__(self, stats, name: str, into: dict = None):
+        self.stats = stats
+        self.name = name
+        self.into = into
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.stats.add(self.name, elapsed)
+        if self.into is not None:
+            self.into[self.name] = elapsed
+
+
+class Stats:
+    """Cumulative stage timings and counters, both threads write here. Off by default, a disabled timer is a shared no-op."""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.timings = dict()
+            self.counters = dict()
+            self.started = time.time()
+
+    def timer(self, name: str, into: dict = None):
+        # into also receives the elapsed time, for timings that belong to one load
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name, into)
+
+    def add(self, name: str, elapsed: float):
+        with self.lock:
+            stat = self.timings.get(name)
+            if stat is None:
+                stat = self.timings[name] = Stat()
+            stat.add(elapsed)
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                'started': int(self.started),
+                'dumped': int(time.time()),
+                'timings': {name: stat.to_dict() for name, stat in sorted(self.timings.items())},
+                'counters': dict(sorted(self.counters.items()))
+            }
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def format_timings(rows: int, timings: dict) -> str:
+    parts = [f'{rows} rows']
+    for name, label in (('parse', 'parsed'), ('render', 'rendered'), ('show', 'shown'), ('paint', 'painted')):
+        if name in timings:
+            parts.append(f'{label} in {timings[name] * 1000:.1f} ms')
+    return ', '.join(parts)
+
+
+stats = Stats()
+timer = stats.timer
+count = stats.count
@@ -0,0 +1,200 @@
+import asyncio
+import struct
+import threading
+import time
+from typing import Callable, Dict, List
+
+import player
+import rcon
+from player import Player
+
+DEFAULT_TIMEOUT = 5.0
+MAX_BACKOFF = 120.0
+
+
+class AsyncRCONClient:
+
+    def __init__(self, host: str, port: int = rcon.DEFAULT_PORT, password: str = ''):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.reader = None
+        self.writer = None
+        self.request_id = 0
+
+    def next_id(self) -> int:
+        self.request_id = self.request_id % 0x7fffffff + 1
+        return self.request_id
+
+    async def read_packet(self):
+        size, = struct.unpack('<i', await self.reader.readexactly(4))
+        if not 10 <= size <= 4096 + 10:
+            raise rcon.RCONError(f'invalid packet size: {size}')
+        data = await self.reader.readexactly(size)
+        request_id, kind = struct.unpack('<ii', data[:8])
+        return request_id, kind, data[8:-2].decode('utf-8', errors='replace')
+
+    async def connect(self):
+        self.close()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request_id = self.next_id()
+        self.writer.write(rcon.pack_packet(request_id, rcon.SERVERDATA_AUTH, self.password))
+        await self.writer.drain()
+        while True:
+            response_id, kind, _ = await self.read_packet()
+            if kind != rcon.SERVERDATA_AUTH_RESPONSE:
+                continue
+            if response_id == -1:
+                self.close()
+                raise rcon.RCONError('authentication failed')
+            if response_id == request_id:
+                return
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+
+    async def aclose(self):
+        # close() and wait for the transport, so it is gone before the loop is
+        writer = self.writer
+        self.close()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except (OSError, EOFError):
+                pass
+
+    async def execute(self, command: str) -> str:
+        if self.writer is None:
+            await self.connect()
+        request_id = self.next_id()
+        end_id = self.next_id()
+        self.writer.write(rcon.pack_packet(request_id, rcon.SERVERDATA_EXECCOMMAND, command) + rcon.pack_packet(end_id, rcon.SERVERDATA_RESPONSE_VALUE, ''))
+        await self.writer.drain()
+        parts = list()
+        while True:
+            response_id, kind, body = await self.read_packet()
+            if response_id == end_id:
+                return ''.join(parts)
+            if response_id == request_id and kind == rcon.SERVERDATA_RESPONSE_VALUE:
+                parts.append(body)
+
+
+class Server:
+
+    def __init__(self, name: str, address: str, password: str = ''):
+        self.name = name
+        self.address = address
+        host, port = rcon.parse_address(address)
+        self.client = AsyncRCONClient(host, port, password)
+        self.players = list()
+        self.error = None
+        self.failures = 0
+        self.next_poll = 0.0
+        self.elapsed = 0.0
+
+
+def load_servers(path: str) -> List[Server]:
+    # one server per line: address [password [name]]
+    servers = list()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.split(None, 2)
+            if not parts or parts[0].startswith('#'):
+                continue
+            address = parts[0]
+            password = parts[1] if len(parts) > 1 else ''
+            name = parts[2].strip() if len(parts) > 2 else address
+            servers.append(Server(name, address, password))
+    return servers
+
+
+class ServerMonitor:
+
+    def __init__(self, servers: List[Server], timeout: float = DEFAULT_TIMEOUT, interval: float = rcon.DEFAULT_INTERVAL):
+        self.servers = servers
+        self.timeout = timeout
+        self.interval = interval
+
+    async def poll_server(self, server: Server):
+        now = time.monotonic()
+        if now < server.next_poll:
+            return
+        try:
+            text = await asyncio.wait_for(server.client.execute('status'), self.timeout)
+        except (OSError, EOFError, asyncio.TimeoutError, rcon.RCONError) as e:
+            # the stream may be half way through a response, start over next time
+            server.client.close()
+            # an unreachable server has no known players, keeping the last ones would show them forever
+            server.players = list()
+            server.error = str(e) or e.__class__.__name__
+            server.failures += 1
+            server.next_poll = now + min(self.interval * 2 ** server.failures, MAX_BACKOFF)
+        else:
+            server.players = list(player.iter_status(text.split('\n')))
+            for p in server.players:
+                p.server = server.name
+            server.error = None
+            server.failures = 0
+        server.elapsed = time.monotonic() - now
+
+    async def poll(self) -> List[Player]:
+        # every server at once, so a round takes as long as the slowest one
+        await asyncio.gather(*(self.poll_server(server) for server in self.servers))
+        return self.merged()
+
+    def merged(self) -> List[Player]:
+        players = [p for server in self.servers for p in server.players]
+        players.sort(key=lambda p: (p.server, p.userid))
+        return players
+
+    def errors(self) -> Dict[str, str]:
+        return {server.name: server.error for server in self.servers if server.error is not None}
+
+    async def run(self, callback: Callable, stopped: asyncio.Event):
+        while not stopped.is_set():
+            callback(await self.poll())
+            try:
+                await asyncio.wait_for(stopped.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        await self.aclose()
+
+    def close(self):
+        for server in self.servers:
+            server.client.close()
+
+    async def aclose(self):
+        await asyncio.gather(*(server.client.aclose() for server in self.servers))
+
+
+class MonitorThread(threading.Thread):
+    """Runs a :class:`ServerMonitor` on its own event loop, for callers that aren't asyncio themselves."""
+
+    def __init__(self, monitor: ServerMonitor, callback: Callable):
+        threading.Thread.__init__(self, name='monitor', daemon=True)
+        self.monitor = monitor
+        self.callback = callback
+        self.loop = asyncio.new_event_loop()
+        self.stopped = None
+        self.stop_requested = False
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.stopped = asyncio.Event()
+        if self.stop_requested:
+            self.stopped.set()
+        self.loop.run_until_complete(self.monitor.run(self.callback, self.stopped))
+        self.loop.close()
+
+    def stop(self):
+        self.stop_requested = True
+        if self.stopped is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        except RuntimeError:
+            # the loop already finished
+            pass
@@ -1,23 +1,41 @@
 import json
 import os
+import tempfile
+import threading
+import time
+import traceback
 
 FILE = 'statusenhancer.json'
+SAVE_DELAY = 1.0
+CLOSE_RETRIES = 3
+RETRY_DELAY = 0.2
 DEFAULT_COLUMNS = {
     'steam64': True,
     'steam2': False,
     'steam3': False,
     'connected': False,
     'profile': True,
+    'times_seen': False,
+    'first_seen': False,
+    'last_seen': False,
+    'known_names': False,
     'custom': list()
 }
+DEFAULT_RCON = {
+    'address': '',
+    'interval': 5
+}
 
 
-def load_options():
-    default = {
-        'columns': DEFAULT_COLUMNS
+def load_options(path: str = FILE, fallback: dict = None):
+    # fallback is returned instead of the defaults when the file is missing or broken
+    default = fallback or {
+        'columns': dict(DEFAULT_COLUMNS, custom=list()),
+        'watchlists': list(),
+        'rcon': dict(DEFAULT_RCON)
     }
-    if os.path.isfile(FILE):
-        with open(FILE, encoding='utf-8') as f:
+    if os.path.isfile(path):
+        with open(path, encoding='utf-8') as f:
             try:
                 d = json.load(f)
             except Exception:
@@ -31,15 +49,131 @@ def load_options():
                     'steam3': d['columns'].get('steam3', False),
                     'connected': d['columns'].get('connected', False),
                     'profile': d['columns'].get('profile', False),
+                    'times_seen': d['columns'].get('times_seen', False),
+                    'first_seen': d['columns'].get('first_seen', False),
+                    'last_seen': d['columns'].get('last_seen', False),
+                    'known_names': d['columns'].get('known_names', False),
                     'custom': clean_custom(d['columns'].get('custom', list()))
-                }
+                },
+                'watchlists': clean_paths(d.get('watchlists', list())),
+                'rcon': clean_rcon(d.get('rcon', dict()))
             }
     return default
 
 
-def save_options(opt):
-    with open(FILE, 'w', encoding='utf-8') as f:
-        json.dump(opt, f, indent=2)
+def save_options(opt, path: str = FILE):
+    write_atomic(path, json.dumps(opt, indent=2))
+
+
+def write_atomic(path: str, text: str):
+    # a crash half way through leaves the old file in place instead of a truncated one
+    fd, tmp = tempfile.mkstemp(prefix='.statusenhancer-', suffix='.tmp', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def file_stamp(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class OptionStore:
+    """Options file that is read again only when it changed on disk, and written a moment after the last change on a background thread."""
+
+    def __init__(self, path: str = FILE, delay: float = SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.options = None
+        self.stamp = None
+        self.pending = None
+        self.timer = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+    def changed(self) -> bool:
+        # unsaved changes win over the file
+        if self.pending is not None:
+            return False
+        return self.options is None or file_stamp(self.path) != self.stamp
+
+    def load(self) -> dict:
+        with self.lock:
+            if not self.changed():
+                return self.options
+            self.stamp = file_stamp(self.path)
+            # a file that doesn't parse, e.g. saved half way through an edit, keeps what we had
+            self.options = load_options(self.path, self.options)
+            return self.options
+
+    def save(self, opt: dict):
+        # serialised right away, so later changes to opt can't race the writer thread
+        with self.lock:
+            self.options = opt
+            self.pending = json.dumps(opt, indent=2)
+            if self.timer is not None:
+                self.timer.cancel()
+            self.schedule()
+
+    def schedule(self):
+        # called with the lock held
+        self.timer = threading.Timer(self.delay, self.flush_pending)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_pending(self):
+        # timer thread, a write that failed is tried again after another delay
+        try:
+            self.flush()
+        except OSError:
+            traceback.print_exc()
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                text, self.pending = self.pending, None
+                # a save may already have replaced the timer that got us here
+                if self.timer is threading.current_thread():
+                    self.timer = None
+            if text is None:
+                return
+            try:
+                write_atomic(self.path, text)
+            except OSError:
+                with self.lock:
+                    # e.g. another program holding the file open on Windows, a newer change wins over this one
+                    if self.pending is None:
+                        self.pending = text
+                    if self.timer is None and not self.closed:
+                        self.schedule()
+                raise
+            with self.lock:
+                # our own write is not a change to load again
+                self.stamp = file_stamp(self.path)
+
+    def close(self):
+        # raises the OSError of the last attempt when the options could not be written
+        with self.lock:
+            self.closed = True
+            timer = self.timer
+        if timer is not None:
+            timer.cancel()
+        for attempt in range(CLOSE_RETRIES):
+            try:
+                self.flush()
+                return
+            except OSError:
+                if attempt == CLOSE_RETRIES - 1:
+                    raise
+                time.sleep(RETRY_DELAY)
 
 
 def clean_custom(customs):
@@ -57,3 +191,24 @@ def clean_custom(customs):
         }
         out.append(custom)
     return out
+
+
+def clean_paths(paths):
+    if not isinstance(paths, list):
+        return list()
+    return [p for p in paths if isinstance(p, str) and p]
+
+
+def clean_rcon(rcon):
+    if not isinstance(rcon, dict):
+        return dict(DEFAULT_RCON)
+    address = rcon.get('address', '')
+    interval = rcon.get('interval', DEFAULT_RCON['interval'])
+    if not isinstance(address, str):
+        address = ''
+    if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval < 1:
+        interval = DEFAULT_RCON['interval']
+    return {
+        'address': address,
+        'interval': interval
+    }
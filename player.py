@@ -1,26 +1,34 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List
 
 from steamid import SteamID
 
 from utils import parse_time
 
 line_pat = re.compile(r'^#\s+(?P<userid>\d+)\s+"(?P<name>.+)"\s+(?P<steamid>\S+)\s+(?P<other>.+)$')
+header_pat = re.compile(r'^#\s+userid\s+name\s+uniqueid\b')
+# same as line_pat, but whitespace never crosses a line break so it can scan a whole dump at once
+bulk_pat = re.compile(r'^#[^\S\n]+(?P<userid>\d+)[^\S\n]+"(?P<name>.+)"[^\S\n]+(?P<steamid>\S+)[^\S\n]+(?P<other>.+)$', re.MULTILINE)
 
 
 class Player:
 
-    def __init__(self, userid: int, name: str, steamid: str, connected: str):
+    def __init__(self, userid: int, name: str, steamid: str, connected: str, server: str = ''):
         self.userid = userid
         self.name = name
         self.steamid = SteamID(steamid)
         self.connected_str = connected
         self.connected = parse_time(connected)
+        self.server = server
 
     def kick_cmd(self) -> str:
         return f'callvote kick {self.userid}'
 
 
+def is_status_header(line: str) -> bool:
+    return header_pat.match(line) is not None
+
+
 def parse_player(line: str) -> Player:
     if not line.startswith('#'):
         return
@@ -41,12 +49,32 @@ def parse_player(line: str) -> Player:
     return player
 
 
-def parse_status(status_str: str) -> List[Player]:
-    lines = status_str.split('\n')
-    players = list()
+def iter_status(lines: Iterable) -> Iterator[Player]:
     for line in lines:
-        player = parse_player(line)
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        player = parse_player(line.rstrip('\n'))
         if player is not None:
-            players.append(player)
-    players.sort(key=lambda p: p.userid)
-    return players
+            yield player
+
+
+def sort_players(players: Iterable[Player]) -> List[Player]:
+    return sorted(players, key=lambda p: p.userid)
+
+
+def parse_status(status_str: str) -> List[Player]:
+    return sort_players(iter_status(status_str.split('\n')))
+
+
+def iter_status_bulk(status_str: str) -> Iterator[Player]:
+    for match in bulk_pat.finditer(status_str):
+        userid, name, steamid, other = match.groups()
+        if steamid == 'BOT':
+            continue
+        other_parts = other.split(None, 1)
+        connected = other_parts[0] if other_parts else ''
+        yield Player(int(userid), name, steamid, connected)
+
+
+def parse_status_bulk(status_str: str) -> List[Player]:
+    return sort_players(iter_status_bulk(status_str))
@@ -0,0 +1,126 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import List
+
+FRAMES = 10
+TOP = 30
+
+
+class Session:
+    """cProfile for the UI thread and every worker job started while it runs, plus tracemalloc for the whole process."""
+
+    def __init__(self, directory: str = '.'):
+        self.prefix = os.path.join(directory, time.strftime('statusenhancer-%Y%m%d-%H%M%S'))
+        self.profile = cProfile.Profile()
+        self.finished = list()
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def start(self):
+        self.started = time.perf_counter()
+        # leave tracing alone when it was already on, e.g. with -X tracemalloc
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start(FRAMES)
+        self.profile.enable()
+
+    @contextmanager
+    def profile_thread(self):
+        # a profiler only sees the thread that enabled it, so each job gets its own,
+        # from 3.12 on the one started in start() covers every thread and a second one can't be enabled
+        if sys.version_info >= (3, 12):
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                if not self.stopped:
+                    self.finished.append(profile)
+
+    def stop(self) -> List[str]:
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self.tracing:
+            tracemalloc.stop()
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            self.stopped = True
+            profiles = list(self.finished)
+
+        stats = pstats.Stats(self.profile)
+        for profile in profiles:
+            stats.add(profile)
+        paths = [f'{self.prefix}.prof', f'{self.prefix}.tracemalloc', f'{self.prefix}-allocations.txt']
+        stats.dump_stats(paths[0])
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>')
+        ])
+        snapshot.dump(paths[1])
+        with open(paths[2], 'w', encoding='utf-8') as f:
+            f.write(allocation_report(snapshot, elapsed, len(profiles)))
+        return paths
+
+
+def module_names() -> dict:
+    names = dict()
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if path:
+            names[os.path.normcase(os.path.abspath(path))] = name
+    return names
+
+
+def allocation_report(snapshot: tracemalloc.Snapshot, elapsed: float, jobs: int) -> str:
+    # memory still held at the end of the session, by the module and the line that allocated it
+    names = module_names()
+    by_file = snapshot.statistics('filename')
+    total = sum(stat.size for stat in by_file)
+    blocks = sum(stat.count for stat in by_file)
+    lines = [
+        f'Profiled {elapsed:.1f} s, {jobs} worker jobs',
+        f'{total / 1024:.1f} KiB in {blocks} blocks still allocated',
+        '',
+        f'Top {TOP} modules',
+    ]
+    for stat in by_file[:TOP]:
+        filename = stat.traceback[0].filename
+        name = names.get(os.path.normcase(os.path.abspath(filename)), filename)
+        lines.append(f'{stat.size / 1024:12.1f} KiB {stat.count:10} blocks  {name}')
+    lines.extend(['', f'Top {TOP} lines'])
+    for stat in snapshot.statistics('lineno')[:TOP]:
+        frame = stat.traceback[0]
+        lines.append(f'{stat.size / 1024:12.1f} KiB {stat.count:10} blocks  {frame.filename}:{frame.lineno}')
+    return '\n'.join(lines) + '\n'
+
+
+active = None
+
+
+def toggle(directory: str = '.') -> List[str]:
+    # starts a session, or stops the running one and returns the files it wrote
+    global active
+    if active is None:
+        active = Session(directory)
+        active.start()
+        return list()
+    session, active = active, None
+    return session.stop()
+
+
+def profile_thread():
+    session = active
+    if session is None:
+        return nullcontext()
+    return session.profile_thread()
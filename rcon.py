@@ -0,0 +1,149 @@
+import socket
+import struct
+import threading
+from typing import Callable, List, Tuple
+
+import player
+from player import Player
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+DEFAULT_PORT = 27015
+DEFAULT_INTERVAL = 5.0
+
+
+class RCONError(Exception):
+    pass
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.strip().rpartition(':')
+    if not host:
+        return port, DEFAULT_PORT
+    if not port.isdigit():
+        raise ValueError(f'invalid port: {port}')
+    return host, int(port)
+
+
+def pack_packet(request_id: int, kind: int, body: str) -> bytes:
+    payload = struct.pack('<ii', request_id, kind) + body.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(payload)) + payload
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('connection closed by server')
+        data += chunk
+    return data
+
+
+def read_packet(sock: socket.socket) -> Tuple[int, int, str]:
+    size, = struct.unpack('<i', recv_exact(sock, 4))
+    if not 10 <= size <= 4096 + 10:
+        raise RCONError(f'invalid packet size: {size}')
+    data = recv_exact(sock, size)
+    request_id, kind = struct.unpack('<ii', data[:8])
+    return request_id, kind, data[8:-2].decode('utf-8', errors='replace')
+
+
+class RCONClient:
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT, password: str = '', timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.sock = None
+        self.request_id = 0
+        self.lock = threading.Lock()
+
+    def next_id(self) -> int:
+        self.request_id = self.request_id % 0x7fffffff + 1
+        return self.request_id
+
+    def connect(self):
+        self.close()
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            request_id = self.next_id()
+            sock.sendall(pack_packet(request_id, SERVERDATA_AUTH, self.password))
+            while True:
+                response_id, kind, _ = read_packet(sock)
+                if kind != SERVERDATA_AUTH_RESPONSE:
+                    continue
+                if response_id == -1:
+                    raise RCONError('authentication failed')
+                if response_id == request_id:
+                    break
+        except BaseException:
+            sock.close()
+            raise
+        self.sock = sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def execute(self, command: str) -> str:
+        # the connection is kept between calls, a broken one is reopened once,
+        # a request that failed may have left part of a response unread so its connection is never reused
+        with self.lock:
+            if self.sock is not None:
+                try:
+                    return self.request(command)
+                except (OSError, RCONError):
+                    self.close()
+            self.connect()
+            try:
+                return self.request(command)
+            except BaseException:
+                self.close()
+                raise
+
+    def request(self, command: str) -> str:
+        # responses can span several packets, an empty packet after the command marks the end
+        request_id = self.next_id()
+        end_id = self.next_id()
+        self.sock.sendall(pack_packet(request_id, SERVERDATA_EXECCOMMAND, command) + pack_packet(end_id, SERVERDATA_RESPONSE_VALUE, ''))
+        parts = list()
+        while True:
+            response_id, kind, body = read_packet(self.sock)
+            if response_id == end_id:
+                return ''.join(parts)
+            if response_id == request_id and kind == SERVERDATA_RESPONSE_VALUE:
+                parts.append(body)
+
+    def status(self) -> List[Player]:
+        return player.parse_status(self.execute('status'))
+
+
+class RCONPoller(threading.Thread):
+
+    def __init__(self, client: RCONClient, on_players: Callable, on_error: Callable = None, interval: float = DEFAULT_INTERVAL):
+        threading.Thread.__init__(self, name='rcon', daemon=True)
+        self.client = client
+        self.on_players = on_players
+        self.on_error = on_error
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                players = self.client.status()
+            except (OSError, RCONError) as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            else:
+                self.on_players(players)
+            self.stopped.wait(self.interval)
+        self.client.close()
+
+    def stop(self):
+        self.stopped.set()
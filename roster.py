@@ -0,0 +1,47 @@
+from typing import List
+
+from player import Player
+
+
+class RosterDiff:
+
+    def __init__(self, added: List[Player], removed: List[Player], changed: List[Player], renamed: List[Player] = None, ticked: List[Player] = None):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        # the part of changed whose name differs, connection time ticks on every status
+        self.renamed = renamed if renamed is not None else list()
+        # players whose connection time alone moved on, part of changed only when it is shown
+        self.ticked = ticked if ticked is not None else list()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+def player_key(player: Player) -> tuple:
+    return player.server, player.userid, int(player.steamid)
+
+
+def diff_players(old: List[Player], new: List[Player], connected: bool = True) -> RosterDiff:
+    # connected=False ignores connection times, which tick on every status but may not be shown at all
+    old_map = {player_key(p): p for p in old}
+    new_keys = set()
+    added = list()
+    changed = list()
+    renamed = list()
+    ticked = list()
+    for p in new:
+        key = player_key(p)
+        new_keys.add(key)
+        prev = old_map.get(key)
+        if prev is None:
+            added.append(p)
+        elif prev.name != p.name:
+            changed.append(p)
+            renamed.append(p)
+        elif prev.connected_str != p.connected_str:
+            ticked.append(p)
+            if connected:
+                changed.append(p)
+    removed = [p for key, p in old_map.items() if key not in new_keys]
+    return RosterDiff(added, removed, changed, renamed, ticked)
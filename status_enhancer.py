@@ -1,20 +1,84 @@
-import webbrowser
+import time
+
+IMPORT_START = time.perf_counter()
+
+import argparse
+import os
+import sys
 from bisect import bisect
 
-import pyperclip
 import wx
 
-import add_column
 import column
-import icon
+import console_log
+import history
+import instrument
 import option
 import player
+import roster
+import watchlist
+import worker
+
+IMPORT_END = time.perf_counter()
 
 __version__ = '1.1.0'
 TIP0 = 'How to use:'
 TIP1 = '1. Execute "status" command in TF2 developer console,'
 TIP2 = '2. Copy the user list part,'
 TIP3 = '3. Click "Load from clipboard" button.'
+TAIL_INTERVAL = 500
+LOG_WILDCARD = 'Console log (*.log)|*.log|All files (*.*)|*.*'
+COL_PADDING = 16
+LIST_WILDCARD = 'Text files (*.txt)|*.txt|All files (*.*)|*.*'
+JSON_WILDCARD = 'JSON files (*.json)|*.json|All files (*.*)|*.*'
+WATCHED_COLOUR = wx.Colour(255, 205, 205)
+PROGRESS_STEP = 500
+ICON_CACHE = f'statusenhancer-{__version__}.png'
+
+
+class listPlayers(wx.ListCtrl):
+
+    def __init__(self, parent):
+        wx.ListCtrl.__init__(
+            self, parent, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize,
+            wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL | wx.LC_HRULES
+        )
+        self.data = list()
+        self.view = None
+        self.marked = set()
+        self.marked_attr = wx.ItemAttr()
+        self.marked_attr.SetBackgroundColour(WATCHED_COLOUR)
+
+    def set_data(self, data, view=None, changed=None):
+        # data is column-major, link columns already masked
+        self.data = data
+        self.view = view
+        count = (len(data[0]) if data else 0) if view is None else len(view)
+        if self.GetItemCount() != count:
+            self.SetItemCount(count)
+        # past a page of changed rows one repaint is cheaper than refreshing them one by one
+        if changed is None or len(changed) > self.GetCountPerPage():
+            self.Refresh()
+            return
+        for item in changed:
+            self.RefreshItem(item)
+
+    def index(self, item):
+        # position in data of the row shown at item
+        return item if self.view is None else self.view[item]
+
+    def item(self, index):
+        if self.view is None:
+            return index
+        return self.view.index(index) if index in self.view else -1
+
+    def OnGetItemAttr(self, item):
+        if self.index(item) in self.marked:
+            return self.marked_attr
+        return None
+
+    def OnGetItemText(self, item, col):
+        return self.data[col][self.index(item)]
 
 
 class frameMain(wx.Frame):
@@ -42,7 +106,11 @@ class frameMain(wx.Frame):
         self.SizerTip.Add(self.StaticTip2, 1, wx.ALL | wx.EXPAND, 0)
         self.SizerTip.Add(self.StaticTip3, 1, wx.ALL | wx.EXPAND, 0)
 
-        self.ListCtrl = wx.ListCtrl(self, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_HRULES)
+        self.SearchCtrl = wx.SearchCtrl(self, wx.ID_ANY, '', wx.DefaultPosition, wx.DefaultSize, 0)
+        self.SearchCtrl.SetDescriptiveText('Search names, including earlier names')
+        self.SearchCtrl.ShowCancelButton(True)
+
+        self.ListCtrl = listPlayers(self)
         self.SizerTop.Add(self.ListCtrl, 1, wx.ALL | wx.EXPAND, 5)
 
         self.ButtonLoad = wx.Button(self, wx.ID_ANY, '&Load from clipboard', wx.DefaultPosition, wx.Size(-1, 35), 0)
@@ -51,10 +119,12 @@ class frameMain(wx.Frame):
         self.SizerBottom.Add(self.ButtonClear, 2, wx.ALIGN_CENTER | wx.RIGHT | wx.EXPAND, 5)
 
         self.SizerMain.Add(self.SizerTip, 0, wx.LEFT | wx.RIGHT | wx.TOP | wx.EXPAND, 5)
+        self.SizerMain.Add(self.SearchCtrl, 0, wx.LEFT | wx.RIGHT | wx.TOP | wx.EXPAND, 5)
         self.SizerMain.Add(self.SizerTop, 1, wx.EXPAND, 5)
         self.SizerMain.Add(self.SizerBottom, 0, wx.BOTTOM | wx.EXPAND, 5)
 
         self.SetSizer(self.SizerMain)
+        self.CreateStatusBar()
         self.Layout()
         self.Centre(wx.BOTH)
 
@@ -64,35 +134,239 @@ class frameMain(wx.Frame):
 
         self.ColMenu = wx.Menu()
 
+        self.FileMenu = wx.Menu()
+        self.FileMenu.Append(0, '&Open console log...')
+        self.FileMenu.AppendCheckItem(1, '&Watch console.log...')
+        self.FileMenu.Append(wx.ID_SEPARATOR)
+        self.FileMenu.Append(2, 'Add watch&list...')
+        self.FileMenu.Append(3, 'Clear watchlists')
+        self.FileMenu.Append(wx.ID_SEPARATOR)
+        self.FileMenu.AppendCheckItem(4, 'Poll server via &RCON...')
+        self.FileMenu.AppendCheckItem(5, '&Monitor servers...')
+        self.FileMenu.Append(wx.ID_SEPARATOR)
+        self.FileMenu.AppendCheckItem(6, 'Show &timings')
+        self.FileMenu.Append(7, '&Save timings...')
+        self.MenuBar = wx.MenuBar()
+        self.MenuBar.Append(self.FileMenu, '&File')
+        self.SetMenuBar(self.MenuBar)
+
+        self.TailTimer = wx.Timer(self)
+
         self.ButtonLoad.Bind(wx.EVT_BUTTON, self.OnLoad)
         self.ButtonClear.Bind(wx.EVT_BUTTON, self.OnClear)
+        self.SearchCtrl.Bind(wx.EVT_TEXT, self.OnSearch)
+        self.SearchCtrl.Bind(wx.EVT_SEARCH_CANCEL, self.OnSearchCancel)
         self.ListCtrl.Bind(wx.EVT_LEFT_DCLICK, self.OnListClick)
         self.ListCtrl.Bind(wx.EVT_RIGHT_DOWN, self.OnListRightClick)
         self.ListCtrl.Bind(wx.EVT_LIST_COL_RIGHT_CLICK, self.OnColRightClick)
         self.StatusMenu.Bind(wx.EVT_MENU, self.OnStatusMenu)
         self.ColMenu.Bind(wx.EVT_MENU, self.OnColMenu)
+        self.FileMenu.Bind(wx.EVT_MENU, self.OnFileMenu)
+        self.Bind(wx.EVT_TIMER, self.OnTailTimer, self.TailTimer)
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+        self.Bind(wx.EVT_ACTIVATE, self.OnActivate)
+
+        self.ProfileId = wx.NewIdRef()
+        self.Bind(wx.EVT_MENU, self.OnProfile, id=self.ProfileId)
 
         self.AccTable = wx.AcceleratorTable([
-            (wx.ACCEL_CTRL, ord('V'), self.ButtonLoad.GetId())
+            (wx.ACCEL_CTRL, ord('V'), self.ButtonLoad.GetId()),
+            (wx.ACCEL_CTRL | wx.ACCEL_SHIFT, ord('P'), self.ProfileId)
         ])
         self.SetAcceleratorTable(self.AccTable)
 
-        self.options = option.load_options()
+        self.option_store = option.OptionStore()
+        self.options = self.option_store.load()
 
+        self.app_icon = None
+        self.paint_handler = None
         self.players = list()
+        self.real_data = list()
+        self.pending = None
+        self.tail = None
+        self.roster = None
+        self.poller = None
+        self.monitor = None
+        self.history = history.History()
+        self.watchlist = watchlist.Watchlist(self.options['watchlists'])
+        self.worker = worker.Worker()
         self.columns = column.ColumnManager()
+        self.next_columns = self.columns
         self.reload_columns()
 
     def OnLoad(self, event):
-        clip = pyperclip.paste()
-        players = player.parse_status(clip)
-        if players:
-            self.players = players
-            self.reload_players()
+        import pyperclip
+        with instrument.timer('clipboard'):
+            clip = pyperclip.paste()
+
+        def parse(job):
+            players = list()
+            with instrument.timer('parse', job.timings):
+                for i, p in enumerate(player.iter_status_bulk(clip)):
+                    if i % PROGRESS_STEP == 0:
+                        job.progress(f'Parsing... {i} players')
+                    players.append(p)
+                players = player.sort_players(players)
+            instrument.count('rows_parsed', len(players))
+            return players or None
+
+        self.load(parse)
+
+    def set_icon(self):
+        self.app_icon = load_icon()
+        self.SetIcon(self.app_icon)
 
     def OnClear(self, event):
-        self.players = list()
-        self.reload_players()
+        self.apply_players(list())
+
+    def OnClose(self, event):
+        self.stop_tail()
+        self.stop_rcon()
+        self.stop_monitor()
+        self.worker.shutdown()
+        # only loaded once profiling was started
+        profiling = sys.modules.get('profiling')
+        if profiling is not None and profiling.active is not None:
+            profiling.toggle()
+        self.history.close()
+        try:
+            self.option_store.close()
+        except OSError as e:
+            wx.MessageBox(f'Options could not be saved: {e}', 'Warning', parent=self)
+        event.Skip()
+
+    def OnProfile(self, event):
+        # Ctrl+Shift+P starts cProfile and tracemalloc, pressing it again writes the results
+        import profiling
+        try:
+            paths = profiling.toggle()
+        except OSError as e:
+            wx.MessageBox(str(e), 'Warning', parent=self)
+            return
+        if profiling.active is not None:
+            self.SetStatusText('Profiling, press Ctrl+Shift+P again to stop')
+            return
+        self.SetStatusText(f'Profile written to {os.path.abspath(paths[0])}')
+
+    def OnActivate(self, event):
+        # edits made to the options file while the window was in the background
+        if event.GetActive() and self.option_store.changed():
+            self.options = self.option_store.load()
+            self.watchlist.set_paths(self.options['watchlists'])
+            self.mark_watched()
+            # just read from disk, saving it again would only rewrite the file
+            self.reload_columns(save=False)
+        event.Skip()
+
+    def OnFileMenu(self, event):
+        sel = event.GetId()
+        if sel == 0:
+            dialog = wx.FileDialog(self, 'Open console log', wildcard=LOG_WILDCARD, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+            if dialog.ShowModal() == wx.ID_OK:
+                self.load_log(dialog.GetPath())
+            dialog.Destroy()
+        if sel == 1:
+            if self.tail is not None:
+                self.stop_tail()
+                return
+            dialog = wx.FileDialog(self, 'Watch console.log', wildcard=LOG_WILDCARD, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+            if dialog.ShowModal() == wx.ID_OK:
+                self.start_tail(dialog.GetPath())
+            dialog.Destroy()
+            self.FileMenu.Check(1, self.tail is not None)
+        if sel == 2:
+            dialog = wx.FileDialog(self, 'Add watchlist', wildcard=LIST_WILDCARD, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST | wx.FD_MULTIPLE)
+            if dialog.ShowModal() == wx.ID_OK:
+                paths = [p for p in dialog.GetPaths() if p not in self.options['watchlists']]
+                self.options['watchlists'].extend(paths)
+                self.watchlist.set_paths(self.options['watchlists'])
+                self.option_store.save(self.options)
+                self.mark_watched()
+            dialog.Destroy()
+        if sel == 3:
+            self.options['watchlists'] = list()
+            self.watchlist.set_paths(list())
+            self.option_store.save(self.options)
+            self.mark_watched()
+        if sel == 4:
+            if self.poller is not None:
+                self.stop_rcon()
+                return
+            self.start_rcon()
+            self.FileMenu.Check(4, self.poller is not None)
+
+        if sel == 5:
+            if self.monitor is not None:
+                self.stop_monitor()
+                return
+            dialog = wx.FileDialog(self, 'Server list (address password name per line)', wildcard=LIST_WILDCARD, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+            if dialog.ShowModal() == wx.ID_OK:
+                self.start_monitor(dialog.GetPath())
+            dialog.Destroy()
+            self.FileMenu.Check(5, self.monitor is not None)
+        if sel == 6:
+            instrument.stats.enabled = not instrument.stats.enabled
+            if not instrument.stats.enabled:
+                self.SetStatusText('')
+        if sel == 7:
+            dialog = wx.FileDialog(self, 'Save timings', defaultFile='statusenhancer-timings.json', wildcard=JSON_WILDCARD, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+            if dialog.ShowModal() == wx.ID_OK:
+                try:
+                    instrument.stats.dump(dialog.GetPath())
+                except OSError as e:
+                    wx.MessageBox(str(e), 'Warning', parent=self)
+            dialog.Destroy()
+
+    def OnMonitorPlayers(self, players):
+        if self.monitor is not None:
+            self.apply_players(players)
+
+    def OnRCONPlayers(self, players):
+        if self.poller is not None and players:
+            self.apply_players(players)
+
+    def OnRCONError(self, error):
+        # connection problems are retried on the next poll, a wrong password is not
+        if self.poller is None:
+            return
+        import rcon
+        if not isinstance(error, rcon.RCONError):
+            # the next roster that comes in clears it
+            self.SetStatusText(f'RCON: {error}, retrying')
+            return
+        self.stop_rcon()
+        self.FileMenu.Check(4, False)
+        wx.MessageBox(f'RCON: {error}', 'Warning', parent=self)
+
+    def OnTailTimer(self, event):
+        try:
+            lines = self.tail.read_lines()
+        except OSError:
+            return
+        if lines or self.tail.partial:
+            players = self.roster.feed(lines)
+        else:
+            # a tick without anything new, the dump read so far is all there is
+            players = self.roster.flush()
+        if players:
+            self.apply_players(players)
+
+    def OnJobProgress(self, job, text):
+        if job is self.worker.job:
+            self.SetStatusText(text)
+
+    def OnJobError(self, job, error):
+        # a load that failed is dropped, so that the next one doesn't start it again
+        if job is self.worker.job:
+            self.pending = None
+            self.SetStatusText(f'Loading failed: {error}')
+
+    def OnSearch(self, event):
+        lc = self.ListCtrl
+        lc.set_data(lc.data, self.filter_view())
+
+    def OnSearchCancel(self, event):
+        self.SearchCtrl.Clear()
 
     def OnListClick(self, event):
         lc = self.ListCtrl
@@ -106,7 +380,8 @@ class frameMain(wx.Frame):
         lc.Select(row)
 
         if self.columns.is_link(col):
-            webbrowser.open(self.real_data[row][col], new=2, autoraise=False)
+            import webbrowser
+            webbrowser.open(self.real_data[col][lc.index(row)], new=2, autoraise=False)
 
     def OnListRightClick(self, event):
         lc = self.ListCtrl
@@ -120,7 +395,8 @@ class frameMain(wx.Frame):
         lc.Focus(row)
         lc.Select(row)
 
-        self.StatusMenu.attached_row = row
+        # a roster loaded while the menu is open may move the row, so remember the player instead
+        self.StatusMenu.attached_key = roster.player_key(self.players[lc.index(row)])
         self.StatusMenu.attached_col = col
         if self.columns.is_link(col):
             self.StatusMenu.SetLabel(0, '&Copy URL')
@@ -136,12 +412,18 @@ class frameMain(wx.Frame):
         lc.PopupMenu(self.ColMenu)
 
     def OnStatusMenu(self, event):
-        row, col = self.StatusMenu.attached_row, self.StatusMenu.attached_col
+        import pyperclip
+        key, col = self.StatusMenu.attached_key, self.StatusMenu.attached_col
+        keys = [roster.player_key(p) for p in self.players]
+        if key not in keys or col >= len(self.real_data):
+            # the player left, or the columns changed, while the menu was open
+            return
+        row = keys.index(key)
         sel = event.GetId()
         if sel == 0:
-            pyperclip.copy(self.real_data[row][col])
+            pyperclip.copy(self.real_data[col][row])
         if sel == 1:
-            pyperclip.copy(self.players[self.StatusMenu.attached_row].kick_cmd())
+            pyperclip.copy(self.players[row].kick_cmd())
 
     def OnColMenu(self, event):
         opt = self.options['columns']
@@ -157,9 +439,19 @@ class frameMain(wx.Frame):
             opt['connected'] = not opt['connected']
         if sel == 4:
             opt['profile'] = not opt['profile']
+        if sel == 7:
+            opt['times_seen'] = not opt['times_seen']
+        if sel == 8:
+            opt['first_seen'] = not opt['first_seen']
+        if sel == 9:
+            opt['last_seen'] = not opt['last_seen']
+        if sel == 10:
+            opt['known_names'] = not opt['known_names']
         if sel == 5:
+            import add_column
             dialog = add_column.dialogCustom(self)
-            dialog.SetIcon(self.app_icon)
+            if self.app_icon is not None:
+                dialog.SetIcon(self.app_icon)
             ret = dialog.ShowModal()
             if ret == wx.OK:
                 opt['custom'].append(dialog.get_custom())
@@ -174,50 +466,268 @@ class frameMain(wx.Frame):
             opt['custom'].pop(idx)
         self.reload_columns()
 
-    def reload_columns(self):
-        lc = self.ListCtrl
-        col_map = {
-            'steam64': column.ColumnSteam64(),
-            'steam2': column.ColumnSteam2(),
-            'steam3': column.ColumnSteam3(),
-            'connected': column.ColumnConnected(),
-            'profile': column.ColumnProfile()
-        }
-        self.columns.clear()
-        col_objs = [
-            column.ColumnUserID(),
-            column.ColumnName()
-        ]
-        for k, v in col_map.items():
-            if self.options['columns'][k]:
-                col_objs.append(v)
-        for i, custom in enumerate(self.options['columns']['custom']):
-            col_objs.append(column.CustomColumn(i, custom['name'], custom['format']))
-        self.columns.register(*col_objs)
-        lc.ClearAll()
-        for i in range(self.columns.count):
-            col = self.columns.columns[i]
-            lc.InsertColumn(i, col.name)
-        option.save_options(self.options)
+    def reload_columns(self, save: bool = True):
+        self.next_columns = column.ColumnManager()
+        self.next_columns.register(*column.from_options(self.options['columns'], self.history.cache, self.monitor is not None))
+        if save:
+            self.option_store.save(self.options)
         self.reload_players()
 
     def reload_players(self):
+        if self.pending is not None:
+            # a roster still being loaded is picked up with the new columns
+            self.load(self.pending)
+            return
+        players = self.players
+        self.load(lambda job: players, record=False)
+
+    def load_log(self, path):
+        try:
+            players = console_log.load_latest_status(path)
+        except OSError as e:
+            wx.MessageBox(str(e), 'Warning', parent=self)
+            return
+        if players:
+            self.apply_players(players)
+
+    def start_tail(self, path):
+        self.load_log(path)
+        self.tail = console_log.LogTail(path)
+        self.roster = console_log.RosterTracker()
+        self.TailTimer.Start(TAIL_INTERVAL)
+
+    def stop_tail(self):
+        self.TailTimer.Stop()
+        self.tail = None
+        self.roster = None
+
+    def apply_players(self, players):
+        self.load(lambda job: players)
+
+    def load(self, parse, record=True):
+        # parse(job) runs on the worker thread and returns the new roster, or None to keep the current one
+        old = (self.players, self.real_data, self.columns)
+        columns = self.next_columns
+        self.pending = parse if record else None
+        instrument.count('loads')
+        self.worker.submit(
+            lambda job: self.render_players(job, parse(job), *old, columns, record),
+            lambda job, result: wx.CallAfter(self.show_players, job, result),
+            lambda job, text: wx.CallAfter(self.OnJobProgress, job, text),
+            lambda job, error: wx.CallAfter(self.OnJobError, job, error)
+        )
+
+    def render_players(self, job, players, old_players, old_rows, old_columns, columns, record):
+        # worker thread, must not touch any widget or write anything, the roster is only recorded once it is shown
+        if players is None:
+            return None
+        job.check()
+        with instrument.timer('diff'):
+            diff = roster.diff_players(old_players, players, columns.shows_connected())
+        rerender = columns is not old_columns
+        # an unchanged roster still has to bring in columns changed while it was loading,
+        # and its new connection times even when they aren't shown, a column added later shows them
+        if record and not diff and not diff.ticked and not rerender:
+            return None
+        if columns.has_sightings():
+            with instrument.timer('prefetch'):
+                self.history.cache.prefetch(players)
+
+        with instrument.timer('render', job.timings):
+            # keep the SteamID objects of known players so their cached representations survive the reload
+            steamids = {roster.player_key(p): p.steamid for p in old_players}
+            for p in players:
+                p.steamid = steamids.get(roster.player_key(p), p.steamid)
+            todo = players if rerender else diff.added + diff.changed
+            real_data = [list() for _ in range(columns.count)]
+            for start in range(0, len(todo), PROGRESS_STEP):
+                job.progress(f'Rendering... {start * 100 // len(todo)}%')
+                for cells, rendered in zip(real_data, columns.render(todo[start:start + PROGRESS_STEP])):
+                    cells.extend(rendered)
+            changed_keys = None
+            if not rerender:
+                # cells of untouched players come from the previous render, which follows the new cells
+                index = {roster.player_key(p): len(todo) + i for i, p in enumerate(old_players)}
+                index.update((roster.player_key(p), i) for i, p in enumerate(todo))
+                order = [index[roster.player_key(p)] for p in players]
+                real_data = [[cells[i] for i in order] for cells in map(list.__add__, real_data, old_rows)]
+                changed_keys = {roster.player_key(p) for p in diff.changed}
+        instrument.count('rows_rendered', len(todo))
+        # a sighting per connection, polls only tick the connection time of everyone still there
+        recorded = diff.added + diff.renamed if record else list()
+        return players, real_data, diff, columns, changed_keys, recorded
+
+    def show_players(self, job, result):
+        if job is not self.worker.job:
+            return
+        self.pending = None
+        self.SetStatusText('')
+        if result is None:
+            return
+        with instrument.timer('show', job.timings):
+            self.populate(*result)
+        if instrument.stats.enabled:
+            self.watch_paint(job, len(self.players))
+
+    def populate(self, players, real_data, diff, columns, changed_keys, recorded):
         lc = self.ListCtrl
-        lc.DeleteAllItems()
-        self.real_data = list()
-        for i, p in enumerate(self.players):
-            items = self.columns.get_item(p)
-            self.real_data.append(items)
-            lc.Append(self.columns.filter_link_items(items))
-        self.adjust()
+        selected = lc.GetFirstSelected()
+        selected_key = roster.player_key(self.players[lc.index(selected)]) if selected >= 0 else None
+        top = lc.GetTopItem()
+        top_key = roster.player_key(self.players[lc.index(top)]) if 0 <= top < lc.GetItemCount() else None
+        if selected >= 0:
+            lc.Select(selected, False)
+
+        if columns is not self.columns:
+            self.columns = columns
+            lc.set_data(list())
+            lc.ClearAll()
+            for i in range(columns.count):
+                lc.InsertColumn(i, columns.columns[i].name)
+            top = 0
+        keys = [roster.player_key(p) for p in players]
+        if self.record_sightings(recorded, players, keys, real_data, columns):
+            changed_keys = None
+        self.players = players
+        self.real_data = real_data
+
+        view = self.filter_view()
+        watch_changed = self.watchlist.refresh()
+        if watch_changed or changed_keys is None or diff.added or diff.removed:
+            lc.marked = self.watched()
+        changed = None
+        if changed_keys is not None and not diff.added and not diff.removed and view is None and not watch_changed:
+            changed = [i for i, key in enumerate(keys) if key in changed_keys]
+        lc.set_data(self.columns.mask_links(self.real_data), view, changed)
+
+        if selected_key in keys and lc.item(keys.index(selected_key)) >= 0:
+            lc.Select(lc.item(keys.index(selected_key)))
+        if top_key in keys and lc.item(keys.index(top_key)) >= 0 and lc.item(keys.index(top_key)) != top:
+            lc.ScrollLines(lc.item(keys.index(top_key)) - top)
+        if changed_keys is None or diff.added or diff.changed:
+            with instrument.timer('adjust'):
+                self.adjust()
+
+    def record_sightings(self, recorded, players, keys, real_data, columns) -> bool:
+        # recording moves the cached sightings of those players on, so their sighting cells are rendered again
+        self.history.record(recorded)
+        if not recorded or not columns.has_sightings():
+            return False
+        recorded_keys = {roster.player_key(p) for p in recorded}
+        rows = [i for i, key in enumerate(keys) if key in recorded_keys]
+        for col in range(columns.count):
+            col_obj = columns.columns[col]
+            if not isinstance(col_obj, column.SightingColumn):
+                continue
+            cells = real_data[col]
+            for i, cell in zip(rows, col_obj.render([players[i] for i in rows])):
+                cells[i] = cell
+        return True
+
+    def watch_paint(self, job, rows):
+        # the list repaints on its own after set_data, the readout goes up once that paint is handled
+        lc = self.ListCtrl
+        shown = time.perf_counter()
+
+        def on_paint(event):
+            event.Skip()
+            lc.Unbind(wx.EVT_PAINT, handler=on_paint)
+            self.paint_handler = None
+            wx.CallAfter(painted)
+
+        def painted():
+            elapsed = time.perf_counter() - shown
+            instrument.stats.add('paint', elapsed)
+            job.timings['paint'] = elapsed
+            if job is self.worker.job and instrument.stats.enabled:
+                self.SetStatusText(instrument.format_timings(rows, job.timings))
+
+        if self.paint_handler is not None:
+            lc.Unbind(wx.EVT_PAINT, handler=self.paint_handler)
+        self.paint_handler = on_paint
+        lc.Bind(wx.EVT_PAINT, on_paint)
+
+    def watched(self):
+        return {i for i, p in enumerate(self.players) if int(p.steamid) in self.watchlist}
+
+    def mark_watched(self):
+        lc = self.ListCtrl
+        lc.marked = self.watched()
+        lc.Refresh()
+
+    def filter_view(self):
+        text = self.SearchCtrl.GetValue().strip()
+        if not text:
+            return None
+        known = self.history.search(text)
+        return [i for i, p in enumerate(self.players) if int(p.steamid) in known or history.name_matches(text, p.name)]
+
+    def start_rcon(self):
+        # rcon and monitor, with asyncio behind it, are only loaded when polling is started
+        import rcon
+        opt = self.options['rcon']
+        dialog = wx.TextEntryDialog(self, 'Server address (host:port):', 'Poll server via RCON', opt['address'])
+        ret = dialog.ShowModal()
+        address = dialog.GetValue().strip()
+        dialog.Destroy()
+        if ret != wx.ID_OK or not address:
+            return
+        try:
+            host, port = rcon.parse_address(address)
+        except ValueError as e:
+            wx.MessageBox(str(e), 'Warning', parent=self)
+            return
+        dialog = wx.PasswordEntryDialog(self, 'RCON password:', 'Poll server via RCON')
+        ret = dialog.ShowModal()
+        password = dialog.GetValue()
+        dialog.Destroy()
+        if ret != wx.ID_OK:
+            return
+        opt['address'] = address
+        self.option_store.save(self.options)
+        client = rcon.RCONClient(host, port, password)
+        self.poller = rcon.RCONPoller(
+            client,
+            lambda players: wx.CallAfter(self.OnRCONPlayers, players),
+            lambda error: wx.CallAfter(self.OnRCONError, error),
+            opt['interval']
+        )
+        self.poller.start()
+
+    def stop_rcon(self):
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+
+    def start_monitor(self, path):
+        import monitor
+        try:
+            servers = monitor.load_servers(path)
+        except (OSError, ValueError) as e:
+            wx.MessageBox(str(e), 'Warning', parent=self)
+            return
+        if not servers:
+            return
+        server_monitor = monitor.ServerMonitor(servers, interval=self.options['rcon']['interval'])
+        self.monitor = monitor.MonitorThread(server_monitor, lambda players: wx.CallAfter(self.OnMonitorPlayers, players))
+        self.reload_columns()
+        self.monitor.start()
+
+    def stop_monitor(self):
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor = None
+            self.reload_columns()
 
     def adjust(self):
         lc = self.ListCtrl
-        col_count = lc.GetColumnCount()
-        if col_count <= 0:
-            return
-        for col in range(col_count):
-            lc.SetColumnWidth(col, wx.LIST_AUTOSIZE_USEHEADER)
+        # autosizing a virtual list would only measure the visible rows, so measure the longest text instead
+        for col in range(lc.GetColumnCount()):
+            texts = [self.columns.columns[col].name]
+            if lc.data and lc.data[col]:
+                texts.append(max(lc.data[col], key=len))
+            width = max(lc.GetTextExtent(text).GetWidth() for text in texts)
+            lc.SetColumnWidth(col, width + COL_PADDING)
 
     def pos_to_cell(self, x, y):
         lc = self.ListCtrl
@@ -244,6 +754,11 @@ class frameMain(wx.Frame):
         menu.AppendCheckItem(3, 'Connected')
         menu.AppendCheckItem(4, 'Profile')
         menu.Append(wx.ID_SEPARATOR)
+        menu.AppendCheckItem(7, 'Times seen')
+        menu.AppendCheckItem(8, 'First seen')
+        menu.AppendCheckItem(9, 'Last seen')
+        menu.AppendCheckItem(10, 'Known names')
+        menu.Append(wx.ID_SEPARATOR)
         menu.Append(5, '&Add custom column...')
         if self.columns.is_custom(col):
             menu.Append(wx.ID_SEPARATOR)
@@ -259,14 +774,92 @@ class frameMain(wx.Frame):
             menu.FindItemById(3).Check()
         if opt['profile']:
             menu.FindItemById(4).Check()
+        if opt['times_seen']:
+            menu.FindItemById(7).Check()
+        if opt['first_seen']:
+            menu.FindItemById(8).Check()
+        if opt['last_seen']:
+            menu.FindItemById(9).Check()
+        if opt['known_names']:
+            menu.FindItemById(10).Check()
+
+
+def load_icon() -> wx.Icon:
+    # the embedded image needs wx.lib and a base64 pass to decode, after the first run a plain PNG is read instead
+    no_log = wx.LogNull()
+    bitmap = wx.Bitmap()
+    if not os.path.isfile(ICON_CACHE) or not bitmap.LoadFile(ICON_CACHE, wx.BITMAP_TYPE_PNG):
+        import icon
+        bitmap = icon.icon.GetBitmap()
+        bitmap.SaveFile(ICON_CACHE, wx.BITMAP_TYPE_PNG)
+    del no_log
+    app_icon = wx.Icon()
+    app_icon.CopyFromBitmap(bitmap)
+    return app_icon
+
+
+class StartupProfile:
+
+    def __init__(self):
+        self.timings = [('imports', IMPORT_END - IMPORT_START)]
+        self.last = IMPORT_END
+        self.window = None
+        self.icon = None
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.timings.append((name, now - self.last))
+        self.last = now
+        if name == 'first paint':
+            self.window = now - IMPORT_START
+            self.report()
+
+    def icon_loaded(self, elapsed: float):
+        self.icon = elapsed
+        self.report()
+
+    def report(self):
+        # the icon is decoded after the window shows, wait for both
+        if self.window is None or self.icon is None:
+            return
+        lines = ['startup profile:']
+        lines.extend(f'  {name:<15} {elapsed * 1000:8.1f} ms' for name, elapsed in self.timings)
+        lines.append(f'  {"time to window":<15} {self.window * 1000:8.1f} ms')
+        lines.append(f'  {"icon":<15} {self.icon * 1000:8.1f} ms')
+        print('\n'.join(lines), file=sys.stderr)
 
 
-if __name__ == '__main__':
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='statusenhancer', description='TF2 status enhancer.')
+    parser.add_argument('--startup-profile', action='store_true', help='print import, window and first paint timings to stderr')
+    args = parser.parse_args(argv)
+    profile = StartupProfile() if args.startup_profile else None
+
     app = wx.App(False)
+    if profile:
+        profile.mark('wx.App')
     frame = frameMain(None)
-    frame.app_icon = wx.Icon()
-    frame.app_icon.CopyFromBitmap(icon.icon.GetBitmap())
-    frame.SetIcon(frame.app_icon)
     frame.SetTitle('{} {}'.format(frame.GetTitle(), __version__))
+    if profile:
+        profile.mark('frame')
+
+        def on_paint(event):
+            event.Skip()
+            frame.ListCtrl.Unbind(wx.EVT_PAINT, handler=on_paint)
+            profile.mark('first paint')
+
+        frame.ListCtrl.Bind(wx.EVT_PAINT, on_paint)
     frame.Show(True)
+
+    def set_icon():
+        start = time.perf_counter()
+        frame.set_icon()
+        if profile:
+            profile.icon_loaded(time.perf_counter() - start)
+
+    wx.CallAfter(set_icon)
     app.MainLoop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import re
+from array import array
 from enum import IntEnum
+from functools import cached_property, lru_cache
 
 
 class SteamIntEnum(IntEnum):
@@ -57,6 +59,21 @@ class ETypeChar(SteamIntEnum):
 
 ETypeChars = ''.join(ETypeChar.__members__.keys())
 
+steam2_pat = re.compile(r"^STEAM_(?P<universe>\d+)"
+                        r":(?P<reminder>[0-1])"
+                        r":(?P<id>\d+)$"
+                        )
+steam3_pat = re.compile(r"^\["
+                        r"(?P<type>[i%s]):"        # type char
+                        r"(?P<universe>[0-4]):"     # universe
+                        r"(?P<id>\d{1,10})"            # accountid
+                        r"(:(?P<instance>\d+))?"  # instance
+                        r"\]$" % ETypeChars
+                        )
+# individual public accounts with the default instance, i.e. every player in a status
+individual_pat = re.compile(r"^\[U:1:(\d{1,10})\]$")
+INDIVIDUAL_BASE = (EUniverse.Public << 56) | (EType.Individual << 52) | (1 << 32)
+
 
 class SteamID(int):
     """
@@ -75,6 +92,9 @@ class SteamID(int):
     EUniverse = EUniverse          #: reference to EUniverse
     EInstanceFlag = EInstanceFlag  #: reference to EInstanceFlag
 
+    # SteamID is immutable, so the enum and string representations below are
+    # computed on first access and kept in the instance __dict__
+
     def __new__(cls, *args, **kwargs):
         steam64 = make_steam64(*args, **kwargs)
         return super(SteamID, cls).__new__(cls, steam64)
@@ -106,14 +126,14 @@ class SteamID(int):
         """
         return (int(self) >> 32) & 0xFFffF
 
-    @property
+    @cached_property
     def type(self):
         """
         :rtype: :py:class:`steam.enum.EType`
         """
         return EType((int(self) >> 52) & 0xF)
 
-    @property
+    @cached_property
     def universe(self):
         """
         :rtype: :py:class:`steam.enum.EUniverse`
@@ -136,7 +156,7 @@ class SteamID(int):
         """
         return int(self)
 
-    @property
+    @cached_property
     def as_steam2(self):
         """
         :return: steam2 format (e.g ``STEAM_1:0:1234``)
@@ -152,7 +172,7 @@ class SteamID(int):
             self.id >> 1,
             )
 
-    @property
+    @cached_property
     def as_steam2_zero(self):
         """
         For GoldSrc and Orange Box games.
@@ -162,7 +182,7 @@ class SteamID(int):
         """
         return self.as_steam2.replace("_1", "_0")
 
-    @property
+    @cached_property
     def as_steam3(self):
         """
         :return: steam3 format (e.g ``[U:1:1234]``)
@@ -191,7 +211,7 @@ class SteamID(int):
 
         return '[%s]' % (':'.join(map(str, parts)))
 
-    @property
+    @cached_property
     def community_url(self):
         """
         :return: e.g https://steamcommunity.com/profiles/123456789
@@ -237,6 +257,173 @@ class SteamID(int):
         return True
 
 
+@lru_cache(maxsize=None)
+def load_numpy():
+    # optional and only wanted for bulk conversions, importing it up front would slow down every start
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class SteamIDArray:
+    """
+    Packed ``uint64`` array of steam64 values for converting many ids at once.
+    Conversions work on the raw integers and never build :class:`SteamID` objects
+    for the common individual accounts.
+    The bit fields are masked over the whole buffer with NumPy when it is installed,
+    otherwise one id at a time. Formatting ids as text is always a loop over the ids,
+    the ``iter_*`` methods and :meth:`write` produce the lines one by one instead of a list.
+    .. code:: python
+        ids = SteamIDArray.from_file('banlist.txt')  # mixed steam2/steam3/steam64, one per line
+        ids.write('banlist_steam3.txt', 'steam3')
+    """
+
+    def __init__(self, values=()):
+        self.values = array('Q', values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    @classmethod
+    def from_strings(cls, lines):
+        """
+        :param lines: iterable of steamids in any format accepted by :func:`make_steam64`,
+            blank lines are skipped and unparsable ids become ``0``
+        :rtype: :class:`SteamIDArray`
+        """
+        values = array('Q')
+        append = values.append
+        match = individual_pat.match
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            m = match(line)
+            if m and int(m.group(1)) <= 0xFFffFFff:
+                append(INDIVIDUAL_BASE | int(m.group(1)))
+                continue
+            # one bad line must not cost the rest of the file
+            try:
+                append(0 if m else make_steam64(line))
+            except (TypeError, ValueError, KeyError, AssertionError, OverflowError):
+                append(0)
+        out = cls()
+        out.values = values
+        return out
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        :param path: newline-delimited file of steamids
+        :rtype: :class:`SteamIDArray`
+        """
+        with open(path, encoding='utf-8') as f:
+            return cls.from_strings(f)
+
+    def field(self, shift, mask, typecode):
+        """
+        :return: ``(value >> shift) & mask`` of every id
+        :rtype: :class:`array` of ``typecode``
+        """
+        numpy = load_numpy()
+        if numpy is not None and self.values:
+            values = numpy.frombuffer(self.values, dtype=numpy.uint64)
+            out = (values >> numpy.uint64(shift)) & numpy.uint64(mask)
+            return array(typecode, out.astype(f'u{array(typecode).itemsize}').tobytes())
+        return array(typecode, ((v >> shift) & mask for v in self.values))
+
+    @property
+    def ids(self):
+        """
+        :rtype: :class:`array` of account ids
+        """
+        return self.field(0, 0xFFffFFff, 'L')
+
+    @property
+    def instances(self):
+        """
+        :rtype: :class:`array`
+        """
+        return self.field(32, 0xFFffF, 'L')
+
+    @property
+    def types(self):
+        """
+        :rtype: :class:`array` of :class:`EType` values
+        """
+        return self.field(52, 0xF, 'B')
+
+    @property
+    def universes(self):
+        """
+        :rtype: :class:`array` of :class:`EUniverse` values
+        """
+        return self.field(56, 0xFF, 'B')
+
+    def iter_64(self):
+        return (str(v) for v in self.values)
+
+    def iter_steam2(self):
+        return ("STEAM_%d:%d:%d" % (v >> 56, v & 1, (v & 0xFFffFFff) >> 1) for v in self.values)
+
+    def iter_steam3(self):
+        return ("[U:1:%d]" % (v & 0xFFffFFff)
+                if v & ~0xFFffFFff == INDIVIDUAL_BASE
+                else SteamID(v).as_steam3
+                for v in self.values)
+
+    def iter_urls(self):
+        suffix = {
+            EType.Individual: "https://steamcommunity.com/profiles/%d",
+            EType.Clan: "https://steamcommunity.com/gid/%d",
+        }
+        return (suffix[(v >> 52) & 0xF] % v if (v >> 52) & 0xF in suffix else None for v in self.values)
+
+    def as_64(self):
+        """
+        :rtype: :class:`list` of :class:`str`
+        """
+        return list(self.iter_64())
+
+    def as_steam2(self):
+        """
+        :rtype: :class:`list` of :class:`str`, see :attr:`SteamID.as_steam2`
+        """
+        return list(self.iter_steam2())
+
+    def as_steam3(self):
+        """
+        :rtype: :class:`list` of :class:`str`, see :attr:`SteamID.as_steam3`
+        """
+        return list(self.iter_steam3())
+
+    def community_url(self):
+        """
+        :rtype: :class:`list` of :class:`str` or ``None``, see :attr:`SteamID.community_url`
+        """
+        return list(self.iter_urls())
+
+    def write(self, path, fmt='steam64'):
+        """
+        Write one id per line, without building the whole output first
+        :param fmt: ``steam64``, ``steam2``, ``steam3`` or ``url``
+        """
+        formats = {
+            'steam64': self.iter_64,
+            'steam2': self.iter_steam2,
+            'steam3': self.iter_steam3,
+            'url': self.iter_urls,
+        }
+        lines = formats[fmt]()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{line or ""}\n' for line in lines)
+
+
 def make_steam64(id=0, *args, **kwargs):
     """
     Returns steam64 from various other representations.
@@ -251,6 +438,11 @@ def make_steam64(id=0, *args, **kwargs):
         make_steam64('[g:1:4]')  # steam3
     """
 
+    if isinstance(id, str) and not args and not kwargs:
+        match = individual_pat.match(id)
+        if match:
+            return INDIVIDUAL_BASE | int(match.group(1))
+
     accountid = id
     etype = EType.Invalid
     universe = EUniverse.Invalid
@@ -328,10 +520,7 @@ def steam2_to_tuple(value):
     .. note::
         The universe will be always set to ``1``. See :attr:`SteamID.as_steam2`
     """
-    match = re.match(r"^STEAM_(?P<universe>\d+)"
-                     r":(?P<reminder>[0-1])"
-                     r":(?P<id>\d+)$", value
-                     )
+    match = steam2_pat.match(value)
 
     if not match:
         return None
@@ -353,14 +542,7 @@ def steam3_to_tuple(value):
     :return: (accountid, type, universe, instance)
     :rtype: :class:`tuple` or :class:`None`
     """
-    match = re.match(r"^\["
-                     r"(?P<type>[i%s]):"        # type char
-                     r"(?P<universe>[0-4]):"     # universe
-                     r"(?P<id>\d{1,10})"            # accountid
-                     r"(:(?P<instance>\d+))?"  # instance
-                     r"\]$" % ETypeChars,
-                     value
-                     )
+    match = steam3_pat.match(value)
     if not match:
         return None
 
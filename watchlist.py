@@ -0,0 +1,60 @@
+import os
+from typing import Iterable
+
+from steamid import make_steam64
+
+
+def load_file(path: str) -> set:
+    # one steamid per line in any format, anything after it is a comment
+    out = set()
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parts = line.split(None, 1)
+            if not parts or parts[0].startswith(('#', '//')):
+                continue
+            try:
+                steam64 = make_steam64(parts[0])
+            except (TypeError, ValueError, KeyError, AssertionError):
+                continue
+            if steam64:
+                out.add(steam64)
+    return out
+
+
+class Watchlist:
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self.files = dict()
+        self.steam64s = set()
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]):
+        paths = list(paths)
+        self.files = {path: self.files.get(path, (None, set())) for path in paths}
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        # only files whose mtime moved are parsed again
+        changed = force
+        for path, (mtime, steam64s) in self.files.items():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current == mtime:
+                continue
+            try:
+                steam64s = load_file(path) if current is not None else set()
+            except OSError:
+                current, steam64s = None, set()
+            self.files[path] = (current, steam64s)
+            changed = True
+        if changed:
+            self.steam64s = set().union(*(steam64s for _, steam64s in self.files.values()))
+        return changed
+
+    def __contains__(self, steam64: int) -> bool:
+        return steam64 in self.steam64s
+
+    def __len__(self):
+        return len(self.steam64s)
@@ -0,0 +1,85 @@
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable
+
+import instrument
+
+PROGRESS_DELAY = 0.2
+PROGRESS_INTERVAL = 0.1
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, on_progress: Callable = None):
+        self.cancelled = threading.Event()
+        self.on_progress = on_progress
+        self.started = time.monotonic()
+        self.reported = 0.0
+        self.timings = dict()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def progress(self, text: str):
+        # also a cancellation point; only jobs running longer than PROGRESS_DELAY report
+        self.check()
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if now - self.started < PROGRESS_DELAY or now - self.reported < PROGRESS_INTERVAL:
+            return
+        self.reported = now
+        self.on_progress(self, text)
+
+
+class Worker:
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='worker')
+        self.job = None
+
+    def submit(self, func: Callable, on_done: Callable, on_progress: Callable = None, on_error: Callable = None) -> Job:
+        # a newer job always cancels the one before it, on_error(job, exception) hears about a job that failed
+        if self.job is not None:
+            self.job.cancel()
+        job = self.job = Job(on_progress)
+
+        def run():
+            # superseded before it got to run
+            if job.cancelled.is_set():
+                return
+            # profiling is imported on first use, until then there is no session to join
+            profiling = sys.modules.get('profiling')
+            try:
+                with profiling.profile_thread() if profiling is not None else nullcontext():
+                    result = func(job)
+            except Cancelled:
+                instrument.count('jobs_cancelled')
+                return
+            except Exception as e:
+                traceback.print_exc()
+                if on_error is not None and not job.cancelled.is_set():
+                    on_error(job, e)
+                return
+            if not job.cancelled.is_set():
+                on_done(job, result)
+
+        self.executor.submit(run)
+        return job
+
+    def shutdown(self):
+        if self.job is not None:
+            self.job.cancel()
+        self.executor.shutdown(wait=True)